@@ -8,6 +8,8 @@ import time
 from enum import Enum
 import json
 import io
+import heapq
+import bisect
 import numpy as np
 
 # Enhanced Enum classes with emojis
@@ -111,12 +113,258 @@ class StudentValidator:
             errors.append("Attendance must be between 0 and 100")
         return errors
 
+class QuantileSketch:
+    # Fixed-width histogram over 0-100; supports removal, merges by adding counts,
+    # and answers percentiles to within half a bin without touching the roster
+    def __init__(self, low=0.0, high=100.0, resolution=0.1):
+        self.low = low
+        self.resolution = resolution
+        self.counts = np.zeros(round((high - low) / resolution) + 1, dtype=np.int64)
+        self.total = 0
+    
+    def add(self, value, count=1):
+        position = min(max(round((value - self.low) / self.resolution), 0), len(self.counts) - 1)
+        self.counts[position] += count
+        self.total += count
+    
+    def merge(self, other):
+        self.counts += other.counts
+        self.total += other.total
+        return self
+    
+    def percentiles(self, percentiles=(10, 25, 50, 75, 90)):
+        if not self.total:
+            return {}
+        ranks = np.maximum(1, np.ceil(np.array(percentiles) / 100 * self.total))
+        positions = np.searchsorted(np.cumsum(self.counts), ranks)
+        return {f"p{p}": round(self.low + position * self.resolution, 6) for p, position in zip(percentiles, positions)}
+
+class AggregateCube:
+    # Materialized group-by; each cell holds count, sum and sum of squares of performance and attendance
+    DIMENSIONS = ('department', 'course', 'grade', 'status', 'attendance_status')
+    
+    def __init__(self):
+        self.cells = {}
+    
+    def add(self, key, performance, attendance, sign=1):
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = [0, 0.0, 0.0, 0.0, 0.0]
+        for i, value in enumerate((1, performance, performance ** 2, attendance, attendance ** 2)):
+            cell[i] += sign * value
+        if not cell[0]:
+            del self.cells[key]
+    
+    def rollup(self, dimensions=(), **filters):
+        # Group by `dimensions` within the slice fixed by `filters`; cost depends on cells, not students
+        positions = [self.DIMENSIONS.index(name) for name in dimensions]
+        fixed = [(self.DIMENSIONS.index(name), value) for name, value in filters.items()]
+        groups = {}
+        for key, cell in self.cells.items():
+            if any(key[i] != value for i, value in fixed):
+                continue
+            totals = groups.setdefault(tuple(key[i] for i in positions), [0, 0.0, 0.0, 0.0, 0.0])
+            for i, value in enumerate(cell):
+                totals[i] += value
+        results = {}
+        for group, (count, performance, performance_squares, attendance, attendance_squares) in groups.items():
+            performance_mean = performance / count
+            attendance_mean = attendance / count
+            results[group] = {
+                'count': count,
+                'performance_mean': performance_mean,
+                'performance_std': max(performance_squares / count - performance_mean ** 2, 0) ** 0.5,
+                'attendance_mean': attendance_mean,
+                'attendance_std': max(attendance_squares / count - attendance_mean ** 2, 0) ** 0.5
+            }
+        return results
+
+class RunningMoments:
+    # Welford means and co-moments for a few numeric fields; add and remove are O(1) deltas
+    FIELDS = ('performance', 'attendance', 'age')
+    
+    def __init__(self):
+        self.clear()
+    
+    def clear(self):
+        self.count = 0
+        self.means = [0.0] * len(self.FIELDS)
+        self.comoments = [[0.0] * len(self.FIELDS) for _ in self.FIELDS]
+    
+    def add(self, values):
+        self.count += 1
+        before = [value - mean for value, mean in zip(values, self.means)]
+        self.means = [mean + delta / self.count for mean, delta in zip(self.means, before)]
+        after = [value - mean for value, mean in zip(values, self.means)]
+        for i, row in enumerate(self.comoments):
+            for j in range(len(row)):
+                row[j] += before[i] * after[j]
+    
+    def remove(self, values):
+        # Welford's update run backwards; rounding error builds up, so RosterTotals rebuilds periodically
+        if self.count <= 1:
+            self.clear()
+            return
+        after = [value - mean for value, mean in zip(values, self.means)]
+        self.count -= 1
+        self.means = [mean - delta / self.count for mean, delta in zip(self.means, after)]
+        before = [value - mean for value, mean in zip(values, self.means)]
+        for i, row in enumerate(self.comoments):
+            for j in range(len(row)):
+                row[j] -= before[i] * after[j]
+        if self.count == 1:
+            # A single value has no spread; drop the leftover rounding error
+            self.comoments = [[0.0] * len(self.FIELDS) for _ in self.FIELDS]
+    
+    def rebuild(self, rows):
+        self.clear()
+        for values in rows:
+            self.add(values)
+    
+    def mean(self, field):
+        return self.means[self.FIELDS.index(field)]
+    
+    def variance(self, field):
+        i = self.FIELDS.index(field)
+        return max(self.comoments[i][i], 0.0) / self.count if self.count else 0.0
+    
+    def std(self, field):
+        return self.variance(field) ** 0.5
+    
+    def zscore(self, field, value):
+        std = self.std(field)
+        return (value - self.mean(field)) / std if std else 0.0
+    
+    def correlation(self, first, second):
+        i, j = self.FIELDS.index(first), self.FIELDS.index(second)
+        scale = (max(self.comoments[i][i], 0.0) * max(self.comoments[j][j], 0.0)) ** 0.5
+        return self.comoments[i][j] / scale if scale else 0.0
+
+class RosterTotals:
+    # Running counts, sums, max-heaps and a sorted performance list for the dashboard and analytics,
+    # adjusted per mutation instead of rescanned
+    def __init__(self, students=()):
+        self.contributions = {}
+        self.count = 0
+        self.performance_total = 0
+        self.age_total = 0
+        self.attendance_total = 0
+        self.status_distribution = {status.value: 0 for status in PerformanceStatus}
+        self.grade_distribution = {grade.value: 0 for grade in Grade}
+        self.attendance_distribution = {status.value: 0 for status in AttendanceStatus}
+        self.course_distribution = {}
+        self.department_distribution = {}
+        self.performance_heap = []
+        self.attendance_heap = []
+        self.performances = []
+        self.performance_sketch = QuantileSketch()
+        self.attendance_sketch = QuantileSketch()
+        self.cube = AggregateCube()
+        self.moments = RunningMoments()
+        self.removals = 0
+        # Inverted id sets behind the directory's equality filters
+        self.members = {'grade': {}, 'status': {}, 'department': {}}
+        for student in students:
+            self.add(student)
+    
+    def add(self, student):
+        contribution = (student.performance, student.age, student.attendance, student.calculate_status(),
+                        student.grade, student.calculate_attendance_status(), student.course, student.department,
+                        student.name)
+        self.contributions[student.student_id] = contribution
+        self._apply(student.student_id, contribution, 1)
+        heapq.heappush(self.performance_heap, (-student.performance, student.student_id))
+        heapq.heappush(self.attendance_heap, (-student.attendance, student.student_id))
+        if len(self.performance_heap) > 2 * self.count + 16:
+            self._compact()
+    
+    def remove(self, student_id):
+        # Heap entries are left behind and discarded lazily
+        contribution = self.contributions.pop(student_id, None)
+        if contribution is not None:
+            self._apply(student_id, contribution, -1)
+            self.removals += 1
+            if self.removals > self.count + 16:
+                self._compact()
+    
+    def _apply(self, student_id, contribution, sign):
+        performance, age, attendance, status, grade, attendance_status, course, department, _ = contribution
+        for name, key in (('grade', grade), ('status', status), ('department', department)):
+            members = self.members[name]
+            if sign > 0:
+                members.setdefault(key, set()).add(student_id)
+            else:
+                members[key].discard(student_id)
+                if not members[key]:
+                    del members[key]
+        self.count += sign
+        self.performance_total += sign * performance
+        self.age_total += sign * age
+        self.attendance_total += sign * attendance
+        if sign > 0:
+            bisect.insort(self.performances, performance)
+        else:
+            del self.performances[bisect.bisect_left(self.performances, performance)]
+        self.performance_sketch.add(performance, sign)
+        self.attendance_sketch.add(attendance, sign)
+        self.cube.add((department, course, grade, status, attendance_status), performance, attendance, sign)
+        if sign > 0:
+            self.moments.add((performance, attendance, age))
+        else:
+            self.moments.remove((performance, attendance, age))
+        for distribution, key in ((self.status_distribution, status), (self.grade_distribution, grade),
+                                  (self.attendance_distribution, attendance_status)):
+            distribution[key] = distribution.get(key, 0) + sign
+        for distribution, key in ((self.course_distribution, course), (self.department_distribution, department)):
+            distribution[key] = distribution.get(key, 0) + sign
+            if not distribution[key]:
+                del distribution[key]
+    
+    def _compact(self):
+        self.performance_heap = [(-c[0], student_id) for student_id, c in self.contributions.items()]
+        self.attendance_heap = [(-c[2], student_id) for student_id, c in self.contributions.items()]
+        heapq.heapify(self.performance_heap)
+        heapq.heapify(self.attendance_heap)
+        # Also resync the moments, which drift under removals; amortized O(1) like the heap rebuild
+        self.moments.rebuild((c[0], c[2], c[1]) for c in self.contributions.values())
+        self.removals = 0
+    
+    def _best(self, heap, position):
+        # Skip entries whose student was removed or changed since they were pushed
+        while heap:
+            value, student_id = heap[0]
+            contribution = self.contributions.get(student_id)
+            if contribution is not None and contribution[position] == -value:
+                return contribution[-1]
+            heapq.heappop(heap)
+        return "N/A"
+    
+    def top_performer(self):
+        return self._best(self.performance_heap, 0)
+    
+    def most_attended(self):
+        return self._best(self.attendance_heap, 2)
+
+# Student fields each derived result reads; an update that touches none of them keeps the cached result
+STATISTICS_FIELDS = ('name', 'age', 'grade', 'performance', 'course', 'department', 'attendance')
+ANALYSIS_FIELDS = ('performance', 'attendance')
+CUBE_FIELDS = ('department', 'course', 'grade', 'performance', 'attendance')
+
 class AdvancedStudentManager:
     def __init__(self):
         self.students = []
+        self.student_index = {}
+        # Highest numeric suffix handed out so far, kept next to student_index so new IDs don't scan the roster
+        self.max_id = 0
+        # Roster position of each student, so id sets can be put back in list order
+        self.order = {}
+        self.appended = 0
+        self.totals = RosterTotals()
         self.analytics_data = {}
-        self.cache_stats = None
-        self.cache_time = None
+        # Data version, bumped per mutation, and the version at which each field last changed
+        self.version = 0
+        self.field_versions = {}
+        self.derived = {}
         self.load_sample_data()
     
     def load_sample_data(self):
@@ -150,16 +398,39 @@ class AdvancedStudentManager:
         sample_students[2].add_activity("Exam", "Scored 95% in AI Midterm")
         
         self.students = sample_students
+        self.rebuild_index()
+    
+    def rebuild_index(self):
+        self.student_index = {student.student_id: student for student in self.students}
+        self.max_id = max((self.id_number(student.student_id) for student in self.students), default=0)
+        self.order = {student.student_id: position for position, student in enumerate(self.students)}
+        self.appended = len(self.students)
+        self.totals = RosterTotals(self.students)
+        self.clear_cache()
+    
+    @staticmethod
+    def id_number(student_id):
+        # IDs look like ST001; one without a numeric suffix doesn't take part in numbering
+        suffix = student_id[2:]
+        return int(suffix) if suffix.isdigit() else 0
     
     def get_next_student_id(self):
-        if not self.students:
-            return "ST001"
-        max_id = max(int(s.student_id[2:]) for s in self.students)
-        return f"ST{max_id + 1:03d}"
+        return f"ST{self.max_id + 1:03d}"
+    
+    def _place(self, student_id):
+        self.order[student_id] = self.appended
+        self.appended += 1
     
     def add_student(self, student):
+        if student.student_id in self.student_index:
+            return False, "Student ID already exists"
+        
         try:
             self.students.append(student)
+            self.student_index[student.student_id] = student
+            self.max_id = max(self.max_id, self.id_number(student.student_id))
+            self._place(student.student_id)
+            self.totals.add(student)
             self.clear_cache()
             return True, "Student added successfully"
         except Exception as e:
@@ -169,10 +440,7 @@ class AdvancedStudentManager:
         return self.students
     
     def get_student(self, student_id):
-        for student in self.students:
-            if student.student_id == student_id:
-                return student
-        return None
+        return self.student_index.get(student_id)
     
     def update_student(self, student_id, **kwargs):
         student = self.get_student(student_id)
@@ -184,7 +452,9 @@ class AdvancedStudentManager:
                 if hasattr(student, key):
                     setattr(student, key, value)
             student.last_updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.clear_cache()
+            self.totals.remove(student_id)
+            self.totals.add(student)
+            self.clear_cache(list(kwargs) + ['last_updated'])
             return True, "Student updated successfully"
         except Exception as e:
             return False, f"Error updating student: {str(e)}"
@@ -196,14 +466,35 @@ class AdvancedStudentManager:
         
         try:
             self.students = [s for s in self.students if s.student_id != student_id]
+            del self.student_index[student_id]
+            del self.order[student_id]
+            self.totals.remove(student_id)
             self.clear_cache()
             return True, "Student deleted successfully"
         except Exception as e:
             return False, f"Error deleting student: {str(e)}"
     
-    def clear_cache(self):
-        self.cache_stats = None
-        self.cache_time = None
+    def clear_cache(self, fields=None):
+        # No fields means students were added or removed, which invalidates everything
+        self.version += 1
+        for field in fields or ['*']:
+            self.field_versions[field] = self.version
+    
+    def cached(self, name, fields, compute):
+        stamp = (self.field_versions.get('*', 0),) + tuple(self.field_versions.get(field, 0) for field in fields)
+        entry = self.derived.get(name)
+        if entry is None or entry[0] != stamp:
+            entry = self.derived[name] = (stamp, compute())
+        return entry[1]
+    
+    def get_zscore(self, student_id, field='performance'):
+        student = self.get_student(student_id)
+        if not student:
+            return None
+        return self.totals.moments.zscore(field, getattr(student, field))
+    
+    def get_departments(self):
+        return self.cached('departments', ('department',), lambda: sorted(self.totals.department_distribution))
     
     def search_students(self, query):
         if not query:
@@ -221,85 +512,102 @@ class AdvancedStudentManager:
                 results.append(student)
         return results
     
+    def query_students(self, query=None, status=None, grade=None, department=None):
+        # Equality filters intersect inverted id sets, smallest first; only the survivors get the text match
+        filters = [self.totals.members[name].get(value, set())
+                   for name, value in (('grade', grade), ('status', status), ('department', department)) if value]
+        students = self.students
+        if filters:
+            filters.sort(key=len)
+            student_ids = sorted(filters[0].intersection(*filters[1:]), key=self.order.__getitem__)
+            students = [self.student_index[student_id] for student_id in student_ids]
+        
+        query = query.lower() if query else None
+        results = []
+        for student in students:
+            if query and not (query in student.name.lower() or 
+                              query in student.email.lower() or 
+                              query in student.course.lower() or 
+                              query in student.department.lower() or 
+                              query in student.phone.lower() or
+                              query in student.student_id.lower()):
+                continue
+            results.append(student)
+        return results
+    
     def get_statistics(self):
-        # Cache statistics for 30 seconds
-        current_time = time.time()
-        if self.cache_stats and self.cache_time and (current_time - self.cache_time) < 30:
-            return self.cache_stats
-        
+        return self.cached('statistics', STATISTICS_FIELDS, self._compute_statistics)
+    
+    def _compute_statistics(self):
         if not self.students:
             stats = {}
         else:
-            total_students = len(self.students)
-            average_performance = sum(s.performance for s in self.students) / total_students
-            average_age = sum(s.age for s in self.students) / total_students
-            average_attendance = sum(s.attendance for s in self.students) / total_students
-            
-            status_distribution = {status.value: 0 for status in PerformanceStatus}
-            grade_distribution = {grade.value: 0 for grade in Grade}
-            attendance_distribution = {status.value: 0 for status in AttendanceStatus}
-            course_distribution = {}
-            department_distribution = {}
-            
-            for student in self.students:
-                status = student.calculate_status()
-                attendance_status = student.calculate_attendance_status()
-                
-                status_distribution[status] = status_distribution.get(status, 0) + 1
-                grade_distribution[student.grade] = grade_distribution.get(student.grade, 0) + 1
-                attendance_distribution[attendance_status] = attendance_distribution.get(attendance_status, 0) + 1
-                course_distribution[student.course] = course_distribution.get(student.course, 0) + 1
-                department_distribution[student.department] = department_distribution.get(student.department, 0) + 1
+            totals = self.totals
+            total_students = totals.count
             
             # Performance trends
-            performances = [s.performance for s in self.students]
             performance_trend = "Stable"
-            if len(performances) >= 2:
-                if performances[-1] > performances[0]:
+            if len(self.students) >= 2:
+                if self.students[-1].performance > self.students[0].performance:
                     performance_trend = "Improving"
-                elif performances[-1] < performances[0]:
+                elif self.students[-1].performance < self.students[0].performance:
                     performance_trend = "Declining"
             
             stats = {
                 'total_students': total_students,
-                'average_performance': round(average_performance, 1),
-                'average_age': round(average_age, 1),
-                'average_attendance': round(average_attendance, 1),
-                'status_distribution': status_distribution,
-                'grade_distribution': grade_distribution,
-                'attendance_distribution': attendance_distribution,
-                'course_distribution': course_distribution,
-                'department_distribution': department_distribution,
+                'average_performance': round(totals.performance_total / total_students, 1),
+                'average_age': round(totals.age_total / total_students, 1),
+                'average_attendance': round(totals.attendance_total / total_students, 1),
+                'status_distribution': dict(totals.status_distribution),
+                'grade_distribution': dict(totals.grade_distribution),
+                'attendance_distribution': dict(totals.attendance_distribution),
+                'course_distribution': dict(totals.course_distribution),
+                'department_distribution': dict(totals.department_distribution),
                 'performance_trend': performance_trend,
-                'top_performer': max(self.students, key=lambda x: x.performance).name if self.students else "N/A",
-                'most_attended': max(self.students, key=lambda x: x.attendance).name if self.students else "N/A"
+                'top_performer': totals.top_performer(),
+                'most_attended': totals.most_attended()
             }
         
-        self.cache_stats = stats
-        self.cache_time = current_time
         return stats
     
+    def rollup(self, dimensions=(), **filters):
+        key = ('rollup', tuple(dimensions), tuple(sorted(filters.items())))
+        return self.cached(key, CUBE_FIELDS, lambda: self.totals.cube.rollup(dimensions, **filters))
+    
     def get_performance_analysis(self):
+        return self.cached('performance_analysis', ANALYSIS_FIELDS, self._compute_performance_analysis)
+    
+    def _compute_performance_analysis(self):
         if not self.students:
             return {}
         
-        performances = [s.performance for s in self.students]
-        attendances = [s.attendance for s in self.students]
+        performances = self.totals.performances
+        count = len(performances)
+        middle = count // 2
+        median = performances[middle] if count % 2 else (performances[middle - 1] + performances[middle]) / 2
         
         return {
-            'max_performance': max(performances),
-            'min_performance': min(performances),
-            'median_performance': np.median(performances),
-            'pass_rate': (sum(1 for s in self.students if s.performance >= 60) / len(self.students)) * 100,
-            'excellence_rate': (sum(1 for s in self.students if s.performance >= 90) / len(self.students)) * 100,
-            'avg_attendance': sum(attendances) / len(attendances),
-            'correlation': np.corrcoef(performances, attendances)[0,1] if len(performances) > 1 else 0
+            'max_performance': performances[-1],
+            'min_performance': performances[0],
+            'median_performance': median,
+            'pass_rate': ((count - bisect.bisect_left(performances, 60)) / count) * 100,
+            'excellence_rate': ((count - bisect.bisect_left(performances, 90)) / count) * 100,
+            'avg_attendance': self.totals.moments.mean('attendance'),
+            'performance_std': self.totals.moments.std('performance'),
+            'attendance_std': self.totals.moments.std('attendance'),
+            'correlation': self.totals.moments.correlation('performance', 'attendance') if count > 1 else 0,
+            'performance_bands': self.totals.performance_sketch.percentiles(),
+            'attendance_bands': self.totals.attendance_sketch.percentiles()
         }
     
     def bulk_delete_students(self, student_ids):
         try:
             initial_count = len(self.students)
             self.students = [s for s in self.students if s.student_id not in student_ids]
+            for student_id in student_ids:
+                self.student_index.pop(student_id, None)
+                self.order.pop(student_id, None)
+                self.totals.remove(student_id)
             deleted_count = initial_count - len(self.students)
             self.clear_cache()
             return True, f"Successfully deleted {deleted_count} students"
@@ -372,6 +680,10 @@ class AdvancedStudentManager:
                     )
                     
                     self.students.append(new_student)
+                    self.student_index[student_id] = new_student
+                    self.max_id += 1
+                    self._place(student_id)
+                    self.totals.add(new_student)
                     imported_count += 1
                     
                 except Exception as e:
@@ -987,22 +1299,15 @@ class ModernStudentManagementUI:
         with col2:
             grade_filter = st.selectbox("Grade", ["All"] + [grade.value for grade in Grade])
         with col3:
-            department_filter = st.selectbox("Department", ["All"] + sorted(list(set(s.department for s in self.manager.students))))
+            department_filter = st.selectbox("Department", ["All"] + self.manager.get_departments())
         
         # Get filtered students
-        students = self.manager.get_all_students()
-        
-        if search_query:
-            students = self.manager.search_students(search_query)
-        
-        if status_filter != "All":
-            students = [s for s in students if s.calculate_status() == status_filter]
-        
-        if grade_filter != "All":
-            students = [s for s in students if s.grade == grade_filter]
-        
-        if department_filter != "All":
-            students = [s for s in students if s.department == department_filter]
+        students = self.manager.query_students(
+            query=search_query,
+            status=status_filter if status_filter != "All" else None,
+            grade=grade_filter if grade_filter != "All" else None,
+            department=department_filter if department_filter != "All" else None
+        )
         
         if not students:
             st.info("No student records found matching the current criteria.")
@@ -1089,6 +1394,14 @@ class ModernStudentManagementUI:
             </div>
             """, unsafe_allow_html=True)
         
+        # Percentile bands
+        bands = pd.DataFrame({
+            'Performance': performance_analysis['performance_bands'],
+            'Attendance': performance_analysis['attendance_bands']
+        }).T
+        st.markdown("**Percentile Bands (%)**")
+        st.dataframe(bands, use_container_width=True)
+        
         # Charts
         col1, col2 = st.columns(2)
         
@@ -1133,6 +1446,26 @@ class ModernStudentManagementUI:
                     font=dict(color='white')
                 )
                 st.plotly_chart(fig_grade, use_container_width=True)
+        
+        # Drill-down served from the aggregate cube
+        drill_department = st.selectbox("Drill down by department", ["All"] + self.manager.get_departments())
+        filters = {} if drill_department == "All" else {'department': drill_department}
+        cells = self.manager.rollup(('grade', 'status'), **filters)
+        if cells:
+            fig_drill = px.bar(
+                x=[grade for grade, _ in cells],
+                y=[cell['count'] for cell in cells.values()],
+                color=[status for _, status in cells],
+                title=f"Grade by Performance Status ({drill_department})",
+                labels={'color': 'Status'}
+            )
+            fig_drill.update_layout(
+                xaxis_title="Grade",
+                yaxis_title="Number of Students",
+                paper_bgcolor='#1A1A1A',
+                font=dict(color='white')
+            )
+            st.plotly_chart(fig_drill, use_container_width=True)
     
     def show_student_management(self):
         st.markdown('<div class="card-title">⚙️ Update Student</div>', unsafe_allow_html=True)
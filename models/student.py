@@ -15,8 +15,29 @@ class PerformanceStatus(Enum):
     AVERAGE = "Average"
     NEEDS_IMPROVEMENT = "Needs Improvement"
 
+# Lowest performance for each status, best first; anything below the last one needs improvement
+STATUS_THRESHOLDS = ((90, PerformanceStatus.EXCELLENT.value), (75, PerformanceStatus.GOOD.value),
+                     (60, PerformanceStatus.AVERAGE.value))
+
+def performance_status(performance):
+    for threshold, status in STATUS_THRESHOLDS:
+        if performance >= threshold:
+            return status
+    return PerformanceStatus.NEEDS_IMPROVEMENT.value
+
+def status_bounds(status):
+    # The [low, high) performance range of a status, None for an open end; None for an unknown status
+    high = None
+    for threshold, name in STATUS_THRESHOLDS:
+        if name == status:
+            return threshold, high
+        high = threshold
+    if status == PerformanceStatus.NEEDS_IMPROVEMENT.value:
+        return None, high
+    return None
+
 class Student:
-    def __init__(self, student_id, name, age, grade, email, performance, phone="", course="", department="", enrollment_date=None):
+    def __init__(self, student_id, name, age, grade, email, performance, phone="", course="", department="", enrollment_date=None, last_updated=None):
         self.student_id = student_id
         self.name = name
         self.age = age
@@ -27,7 +48,7 @@ class Student:
         self.course = course
         self.department = department
         self.enrollment_date = enrollment_date or datetime.now().strftime("%Y-%m-%d")
-        self.last_updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.last_updated = last_updated or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
     def to_dict(self):
         return {
@@ -53,21 +74,15 @@ class Student:
             grade=data['grade'],
             email=data['email'],
             performance=data['performance'],
-            phone=data.get('phone', ''),
-            course=data.get('course', ''),
-            department=data.get('department', ''),
-            enrollment_date=data.get('enrollment_date')
+            phone=data.get('phone') or '',
+            course=data.get('course') or '',
+            department=data.get('department') or '',
+            enrollment_date=data.get('enrollment_date'),
+            last_updated=data.get('last_updated')
         )
     
     def calculate_status(self):
-        if self.performance >= 90:
-            return PerformanceStatus.EXCELLENT.value
-        elif self.performance >= 75:
-            return PerformanceStatus.GOOD.value
-        elif self.performance >= 60:
-            return PerformanceStatus.AVERAGE.value
-        else:
-            return PerformanceStatus.NEEDS_IMPROVEMENT.value
+        return performance_status(self.performance)
     
     def get_performance_color(self):
         status = self.calculate_status()
@@ -0,0 +1,120 @@
+import mmap
+import struct
+import sys
+from array import array
+from datetime import datetime
+
+MAGIC = b'SRMSCOL1'
+HEADER = struct.Struct('<8sQQ')
+# Numeric columns are 8 bytes wide so every section after the header stays aligned
+NUMERIC_COLUMNS = (('performance', 'd', float), ('age', 'q', int))
+STRING_COLUMNS = ('student_id', 'name', 'grade', 'email', 'phone', 'course', 'department',
+                  'enrollment_date', 'last_updated')
+RECORD_FIELDS = ('student_id', 'name', 'age', 'grade', 'email', 'performance', 'phone', 'course',
+                 'department', 'enrollment_date', 'last_updated')
+
+
+def _padding(size):
+    return -size % 8
+
+
+def string_defaults():
+    # What Student.from_dict gives an empty field, so packed columns agree with the hydrated Students;
+    # text fields not listed default to ''
+    now = datetime.now()
+    return {'enrollment_date': now.strftime("%Y-%m-%d"), 'last_updated': now.strftime("%Y-%m-%d %H:%M:%S")}
+
+
+def write_columnar(file, records):
+    if sys.byteorder != 'little':
+        raise ValueError("Columnar snapshots are only supported on little-endian hosts")
+    numeric = {name: array(code) for name, code, _ in NUMERIC_COLUMNS}
+    codes = {name: array('I') for name in STRING_COLUMNS}
+    # String table shared by every text column; repeated courses, grades and dates are stored once
+    strings = {}
+    defaults = string_defaults()
+    rows = 0
+    for record in records:
+        for name, _, convert in NUMERIC_COLUMNS:
+            numeric[name].append(convert(record.get(name) or 0))
+        for name in STRING_COLUMNS:
+            value = record.get(name) or defaults.get(name, '')
+            code = strings.get(value)
+            if code is None:
+                code = strings[value] = len(strings)
+            codes[name].append(code)
+        rows += 1
+
+    blob = bytearray()
+    offsets = array('Q', [0])
+    for value in strings:
+        blob += value.encode('utf-8')
+        offsets.append(len(blob))
+
+    file.write(HEADER.pack(MAGIC, rows, len(strings)))
+    for name, _, _ in NUMERIC_COLUMNS:
+        file.write(numeric[name].tobytes())
+    for name in STRING_COLUMNS:
+        data = codes[name].tobytes()
+        file.write(data + b'\0' * _padding(len(data)))
+    file.write(offsets.tobytes())
+    file.write(blob)
+
+
+class ColumnarSnapshot:
+    def __init__(self, path):
+        if sys.byteorder != 'little':
+            raise ValueError("Columnar snapshots are only supported on little-endian hosts")
+        self.path = path
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.rows, string_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a columnar student snapshot")
+
+        view = memoryview(self._mmap)
+        offset = HEADER.size
+        self.columns = {}
+        for name, code, _ in NUMERIC_COLUMNS:
+            size = self.rows * 8
+            self.columns[name] = view[offset:offset + size].cast(code)
+            offset += size
+        for name in STRING_COLUMNS:
+            size = self.rows * 4
+            self.columns[name] = view[offset:offset + size].cast('I')
+            offset += size + _padding(size)
+        size = (string_count + 1) * 8
+        self._offsets = view[offset:offset + size].cast('Q')
+        self._blob = offset + size
+    
+    def __len__(self):
+        return self.rows
+    
+    def string(self, code):
+        start = self._blob + self._offsets[code]
+        end = self._blob + self._offsets[code + 1]
+        return self._mmap[start:end].decode('utf-8')
+    
+    def value(self, name, row):
+        if name in STRING_COLUMNS:
+            return self.string(self.columns[name][row])
+        return self.columns[name][row]
+    
+    def column(self, name):
+        if name not in STRING_COLUMNS:
+            return self.columns[name]
+        decoded = {}
+        values = []
+        for code in self.columns[name]:
+            value = decoded.get(code)
+            if value is None:
+                value = decoded[code] = self.string(code)
+            values.append(value)
+        return values
+    
+    def record(self, row):
+        return {name: self.value(name, row) for name in RECORD_FIELDS}
+    
+    def __iter__(self):
+        for row in range(self.rows):
+            yield self.record(row)
@@ -0,0 +1,568 @@
+import heapq
+import math
+import re
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from operator import itemgetter
+
+TOKEN = re.compile(r'[^\W_]+')
+
+
+class CategoryIndex:
+    # Inverted index: value -> student_ids (a dict used as an insertion-ordered set)
+    def __init__(self, field, key=None):
+        self.field = field
+        self.key = key or (lambda value: value)
+        self.postings = {}
+    
+    def build(self, student_ids, values):
+        self.postings = {}
+        for student_id, value in zip(student_ids, values):
+            self.postings.setdefault(self.key(value), {})[student_id] = None
+    
+    def add(self, record):
+        self.postings.setdefault(self.key(record[self.field]), {})[record['student_id']] = None
+    
+    def remove(self, record):
+        value = self.key(record[self.field])
+        student_ids = self.postings.get(value)
+        if student_ids is not None:
+            student_ids.pop(record['student_id'], None)
+            if not student_ids:
+                del self.postings[value]
+    
+    def lookup(self, value):
+        return list(self.postings.get(value, ()))
+    
+    def match(self, predicate):
+        # Scans the distinct values only, not the students
+        student_ids = []
+        for value, postings in self.postings.items():
+            if predicate(value):
+                student_ids.extend(postings)
+        return student_ids
+    
+    def counts(self):
+        return {value: len(student_ids) for value, student_ids in self.postings.items()}
+
+
+class SortedIndex:
+    # Parallel arrays ordered by (value, student_id); equal values keep their ids sorted for O(log N) removal
+    def __init__(self, field, key=None):
+        self.field = field
+        self.key = key or (lambda value: value)
+        self.values = []
+        self.student_ids = []
+    
+    def build(self, student_ids, values):
+        pairs = sorted(zip(map(self.key, values), student_ids))
+        self.values = [value for value, _ in pairs]
+        self.student_ids = [student_id for _, student_id in pairs]
+    
+    def _position(self, value, student_id):
+        low = bisect_left(self.values, value)
+        high = bisect_right(self.values, value, low)
+        return bisect_left(self.student_ids, student_id, low, high)
+    
+    def add(self, record):
+        value = self.key(record[self.field])
+        position = self._position(value, record['student_id'])
+        self.values.insert(position, value)
+        self.student_ids.insert(position, record['student_id'])
+    
+    def remove(self, record):
+        value = self.key(record[self.field])
+        position = self._position(value, record['student_id'])
+        if position < len(self.values) and self.student_ids[position] == record['student_id']:
+            del self.values[position]
+            del self.student_ids[position]
+    
+    def __len__(self):
+        return len(self.values)
+    
+    def bounds(self, low, high=None):
+        end = len(self.values) if high is None else bisect_right(self.values, high)
+        return bisect_left(self.values, low), end
+    
+    def range(self, low, high):
+        start, end = self.bounds(low, high)
+        return self.student_ids[start:end]
+    
+    def at_least(self, value):
+        return self.student_ids[bisect_left(self.values, value):]
+    
+    def count_at_least(self, value):
+        return len(self.values) - bisect_left(self.values, value)
+    
+    def nth(self, n):
+        return self.values[n]
+    
+    def percentile(self, percentile):
+        # Nearest-rank percentile over the exact values
+        rank = max(1, math.ceil(percentile / 100 * len(self.values)))
+        return self.values[min(rank, len(self.values)) - 1]
+    
+    def page(self, cursor=None, limit=50, descending=False):
+        # Keyset page after (or, descending, before) the (value, student_id) cursor; O(log N + limit)
+        if descending:
+            end = len(self.values) if cursor is None else self._position(*cursor)
+            start = max(0, end - limit)
+            rows = range(end - 1, start - 1, -1)
+            more = start > 0
+        else:
+            start = 0
+            if cursor is not None:
+                start = self._position(*cursor)
+                if start < len(self.values) and (self.values[start], self.student_ids[start]) == tuple(cursor):
+                    start += 1
+            end = min(len(self.values), start + limit)
+            rows = range(start, end)
+            more = end < len(self.values)
+        student_ids = [self.student_ids[row] for row in rows]
+        next_cursor = (self.values[rows[-1]], self.student_ids[rows[-1]]) if rows and more else None
+        return student_ids, next_cursor
+    
+    def top(self, limit):
+        return self.student_ids[:-limit - 1:-1] if limit > 0 else []
+
+
+class TrigramIndex:
+    # Substring index over a few text fields: trigram -> ascending doc numbers.
+    # Docs are never rewritten; an update retires the student's old doc and appends a new one, and
+    # the postings are compacted once retired docs outnumber live ones
+    def __init__(self, fields, key=None):
+        self.fields = fields
+        self.key = key or (lambda value: value)
+        self.postings = {}
+        self.student_ids = []
+        self.doc_of = {}
+    
+    def _trigrams(self, text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+    
+    def _add(self, student_id, values):
+        doc = len(self.student_ids)
+        self.student_ids.append(student_id)
+        self.doc_of[student_id] = doc
+        grams = set()
+        for value in values:
+            grams |= self._trigrams(self.key(value))
+        for gram in grams:
+            postings = self.postings.get(gram)
+            if postings is None:
+                postings = self.postings[gram] = array('I')
+            postings.append(doc)
+    
+    def build(self, student_ids, values):
+        self.postings = {}
+        self.student_ids = []
+        self.doc_of = {}
+        for student_id, row in zip(student_ids, values):
+            self._add(student_id, row)
+    
+    def add(self, record):
+        self._add(record['student_id'], [record[name] for name in self.fields])
+    
+    def remove(self, record):
+        doc = self.doc_of.pop(record['student_id'], None)
+        if doc is not None:
+            self.student_ids[doc] = None
+            if len(self.student_ids) > 2 * len(self.doc_of):
+                self._compact()
+    
+    def _compact(self):
+        # Renumbering live docs in order keeps every posting list ascending
+        renumber = [None] * len(self.student_ids)
+        student_ids = []
+        for doc, student_id in enumerate(self.student_ids):
+            if student_id is not None:
+                renumber[doc] = len(student_ids)
+                student_ids.append(student_id)
+        for gram, postings in list(self.postings.items()):
+            kept = array('I', [renumber[doc] for doc in postings if renumber[doc] is not None])
+            if kept:
+                self.postings[gram] = kept
+            else:
+                del self.postings[gram]
+        self.student_ids = student_ids
+        self.doc_of = {student_id: doc for doc, student_id in enumerate(student_ids)}
+    
+    def candidates(self, text):
+        # Students whose fields contain every trigram of text; callers still verify the substring
+        grams = self._trigrams(text)
+        if not grams:
+            return None
+        postings = sorted((self.postings.get(gram, ()) for gram in grams), key=len)
+        docs = set(postings[0])
+        for doc_list in postings[1:]:
+            if not docs:
+                break
+            docs.intersection_update(doc_list)
+        return [self.student_ids[doc] for doc in sorted(docs) if self.student_ids[doc] is not None]
+
+
+def tokenize(text):
+    return TOKEN.findall((text or '').lower())
+
+
+class TokenIndex:
+    # Word index: token -> {student_id: field-weighted term frequency}, plus a sorted vocabulary for prefixes
+    def __init__(self, fields, weights=None):
+        self.fields = fields
+        self.weights = weights or (1.0,) * len(fields)
+        self.postings = {}
+        self.vocabulary = []
+        self.documents = 0
+    
+    def _terms(self, values):
+        terms = {}
+        for value, weight in zip(values, self.weights):
+            for token in tokenize(value):
+                terms[token] = terms.get(token, 0) + weight
+        return terms
+    
+    def build(self, student_ids, values):
+        self.postings = {}
+        self.documents = 0
+        for student_id, row in zip(student_ids, values):
+            self.documents += 1
+            for token, weight in self._terms(row).items():
+                self.postings.setdefault(token, {})[student_id] = weight
+        self.vocabulary = sorted(self.postings)
+    
+    def add(self, record):
+        self.documents += 1
+        for token, weight in self._terms([record[name] for name in self.fields]).items():
+            postings = self.postings.get(token)
+            if postings is None:
+                postings = self.postings[token] = {}
+                insort(self.vocabulary, token)
+            postings[record['student_id']] = weight
+    
+    def remove(self, record):
+        self.documents -= 1
+        for token in self._terms([record[name] for name in self.fields]):
+            postings = self.postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(record['student_id'], None)
+            if not postings:
+                del self.postings[token]
+                del self.vocabulary[bisect_left(self.vocabulary, token)]
+    
+    def idf(self, token):
+        # BM25 inverse document frequency
+        frequency = len(self.postings[token])
+        return math.log(1 + (self.documents - frequency + 0.5) / (frequency + 0.5))
+    
+    def expand(self, prefix):
+        tokens = []
+        for token in islice(self.vocabulary, bisect_left(self.vocabulary, prefix), None):
+            if not token.startswith(prefix):
+                break
+            tokens.append(token)
+        return tokens
+    
+    def search(self, query, limit=10):
+        # Every term must match; a last term still being typed matches as a prefix
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        prefix = terms.pop() if query[-1:].isalnum() else None
+        if any(term not in self.postings for term in terms):
+            return []
+
+        scores = None
+        # Rarest term first, so the candidate set only shrinks from its smallest start
+        for term in sorted(terms, key=lambda term: len(self.postings[term])):
+            postings, idf = self.postings[term], self.idf(term)
+            if scores is None:
+                scores = {student_id: idf * weight for student_id, weight in postings.items()}
+            else:
+                scores = {student_id: score + idf * postings[student_id]
+                          for student_id, score in scores.items() if student_id in postings}
+            if not scores:
+                return []
+
+        if prefix is not None:
+            expansions = [(self.postings[token], self.idf(token)) for token in self.expand(prefix)]
+            best = {}
+            if scores is None or sum(len(postings) for postings, _ in expansions) <= len(scores) * len(expansions):
+                # Walk the expanded postings
+                for postings, idf in expansions:
+                    for student_id, weight in postings.items():
+                        if scores is None or student_id in scores:
+                            best[student_id] = max(best.get(student_id, 0), idf * weight)
+            else:
+                # Cheaper to probe each remaining candidate against the expansions
+                for student_id in scores:
+                    score = max(idf * postings.get(student_id, 0) for postings, idf in expansions)
+                    if score:
+                        best[student_id] = score
+            if scores is not None:
+                best = {student_id: scores[student_id] + score for student_id, score in best.items()}
+            scores = best
+        return heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+
+
+def edit_distance(a, b):
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    # BK-tree over the distinct name tokens; each node is (token, {distance: child})
+    def __init__(self, field, key=None):
+        self.field = field
+        self.key = key or tokenize
+        self.postings = {}
+        self.root = None
+    
+    def _insert(self, token):
+        if self.root is None:
+            self.root = (token, {})
+            return
+        node = self.root
+        while True:
+            distance = edit_distance(token, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (token, {})
+                return
+            node = child
+    
+    def build(self, student_ids, values):
+        self.postings = {}
+        self.root = None
+        for student_id, value in zip(student_ids, values):
+            self._add(student_id, value)
+    
+    def _add(self, student_id, value):
+        for token in self.key(value):
+            postings = self.postings.get(token)
+            if postings is None:
+                postings = self.postings[token] = {}
+                self._insert(token)
+            postings[student_id] = None
+    
+    def add(self, record):
+        self._add(record['student_id'], record[self.field])
+    
+    def remove(self, record):
+        # Tokens stay in the tree; a token with no students left simply matches nobody
+        for token in self.key(record[self.field]):
+            postings = self.postings.get(token)
+            if postings is not None:
+                postings.pop(record['student_id'], None)
+    
+    def _within(self, token, max_distance):
+        matches = []
+        stack = [self.root] if self.root else []
+        while stack:
+            word, children = stack.pop()
+            distance = edit_distance(token, word)
+            if distance <= max_distance:
+                matches.append((word, distance))
+            # Triangle inequality: only children whose edge is within max_distance of ours can match
+            for edge, child in children.items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        return matches
+    
+    def search(self, text, max_distance):
+        # Every query token must be near some name token; closest total distance first
+        scores = None
+        for token in dict.fromkeys(self.key(text)):
+            best = {}
+            for word, distance in self._within(token, max_distance):
+                for student_id in self.postings[word]:
+                    if distance < best.get(student_id, max_distance + 1):
+                        best[student_id] = distance
+            if scores is None:
+                scores = best
+            else:
+                scores = {student_id: total + best[student_id] for student_id, total in scores.items()
+                          if student_id in best}
+            if not scores:
+                return []
+        return sorted(scores, key=scores.get) if scores else []
+
+
+class RunningTotals:
+    # Roster counts and sums, adjusted per mutation instead of recomputed
+    def __init__(self, fields, key=None):
+        self.fields = fields
+        self.status = key or (lambda performance: performance)
+        self.build((), ())
+    
+    def _apply(self, values, sign):
+        age, performance, grade, course, department = values
+        self.count += sign
+        self.age_total += sign * age
+        self.performance_total += sign * performance
+        for counts, value in ((self.grades, grade), (self.statuses, self.status(performance)),
+                              (self.courses, course or "Undeclared"), (self.departments, department or "Undeclared")):
+            counts[value] = counts.get(value, 0) + sign
+            if not counts[value]:
+                del counts[value]
+    
+    def build(self, student_ids, values):
+        self.count = 0
+        self.age_total = 0
+        self.performance_total = 0
+        self.grades = {}
+        self.statuses = {}
+        self.courses = {}
+        self.departments = {}
+        for row in values:
+            self._apply(row, 1)
+    
+    def add(self, record):
+        self._apply([record[name] for name in self.fields], 1)
+    
+    def remove(self, record):
+        self._apply([record[name] for name in self.fields], -1)
+
+
+class QuantileSketch:
+    # Fixed-width histogram over a bounded range. Unlike t-digest or KLL it supports removal;
+    # sketches merge by adding counts and answer quantiles to within half a bin
+    def __init__(self, low=0.0, high=100.0, resolution=0.1):
+        self.low = low
+        self.resolution = resolution
+        self.counts = [0] * (round((high - low) / resolution) + 1)
+        self.total = 0
+    
+    def _bin(self, value):
+        return min(max(round((value - self.low) / self.resolution), 0), len(self.counts) - 1)
+    
+    def add(self, value, count=1):
+        self.counts[self._bin(value)] += count
+        self.total += count
+    
+    def remove(self, value):
+        self.add(value, -1)
+    
+    def merge(self, other):
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.total += other.total
+        return self
+    
+    def quantiles(self, fractions):
+        # Nearest-rank quantiles, all answered in one pass over the bins
+        if not self.total:
+            return [None] * len(fractions)
+        pending = sorted((max(1, math.ceil(fraction * self.total)), i) for i, fraction in enumerate(fractions))
+        results = [None] * len(fractions)
+        seen = 0
+        for position, count in enumerate(self.counts):
+            seen += count
+            while pending and pending[0][0] <= seen:
+                results[pending.pop(0)[1]] = round(self.low + position * self.resolution, 6)
+            if not pending:
+                break
+        return results
+
+
+class SketchIndex:
+    # One quantile sketch for the roster plus one per group (e.g. department); groups merge on demand
+    def __init__(self, fields, key=None):
+        self.fields = fields
+        self.build((), ())
+    
+    def build(self, student_ids, values):
+        self.overall = QuantileSketch()
+        self.groups = {}
+        for value, group in values:
+            self._add(value, group, 1)
+    
+    def _add(self, value, group, count):
+        self.overall.add(value, count)
+        sketch = self.groups.get(group)
+        if sketch is None:
+            sketch = self.groups[group] = QuantileSketch()
+        sketch.add(value, count)
+    
+    def add(self, record):
+        self._add(*[record[name] for name in self.fields], 1)
+    
+    def remove(self, record):
+        self._add(*[record[name] for name in self.fields], -1)
+    
+    def sketch(self, groups=None):
+        if groups is None:
+            return self.overall
+        merged = QuantileSketch()
+        for group in groups:
+            if group in self.groups:
+                merged.merge(self.groups[group])
+        return merged
+
+
+def summarize(totals, measures):
+    # totals: [count, sum, sum of squares, sum, sum of squares, ...] in measure order
+    count = totals[0]
+    summary = {'count': count}
+    for i, measure in enumerate(measures):
+        total, squares = totals[1 + 2 * i], totals[2 + 2 * i]
+        mean = total / count
+        summary[f'{measure}_mean'] = mean
+        summary[f'{measure}_std'] = math.sqrt(max(squares / count - mean * mean, 0))
+    return summary
+
+
+class AggregateCube:
+    # Materialized group-by over department, course, grade and performance status; each cell keeps
+    # count, sum and sum of squares of performance and age, so roll-ups never touch the records
+    DIMENSIONS = ('department', 'course', 'grade', 'status')
+    MEASURES = ('performance', 'age')
+    
+    def __init__(self, fields, key=None):
+        self.fields = fields
+        self.status = key or (lambda performance: performance)
+        self.cells = {}
+    
+    def _apply(self, values, sign):
+        department, course, grade, performance, age = values
+        key = (department or "Undeclared", course or "Undeclared", grade, self.status(performance))
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = [0, 0, 0, 0, 0]
+        for i, value in enumerate((1, performance, performance * performance, age, age * age)):
+            cell[i] += sign * value
+        if not cell[0]:
+            del self.cells[key]
+    
+    def build(self, student_ids, values):
+        self.cells = {}
+        for row in values:
+            self._apply(row, 1)
+    
+    def add(self, record):
+        self._apply([record[name] for name in self.fields], 1)
+    
+    def remove(self, record):
+        self._apply([record[name] for name in self.fields], -1)
+    
+    def rollup(self, dimensions=(), **filters):
+        # Group by `dimensions` within the slice fixed by `filters`, e.g. rollup(('grade',), department='Science')
+        positions = [self.DIMENSIONS.index(name) for name in dimensions]
+        fixed = [(self.DIMENSIONS.index(name), value) for name, value in filters.items()]
+        groups = {}
+        for key, cell in self.cells.items():
+            if any(key[i] != value for i, value in fixed):
+                continue
+            totals = groups.setdefault(tuple(key[i] for i in positions), [0] * len(cell))
+            for i, value in enumerate(cell):
+                totals[i] += value
+        return {group: summarize(totals, self.MEASURES) for group, totals in groups.items()}
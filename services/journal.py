@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+from contextlib import nullcontext
+from services.storage import load_snapshot, write_snapshot
+
+
+def apply_entry(records, entry):
+    op = entry.get('op')
+    if op == 'add':
+        student_data = entry['student']
+        records[student_data['student_id']] = dict(student_data)
+    elif op == 'update':
+        student_id = entry['student_id']
+        record = records.get(student_id)
+        if record is None:
+            return
+        record.update(entry['fields'])
+        if record['student_id'] != student_id:
+            del records[student_id]
+            records[record['student_id']] = record
+    elif op == 'delete':
+        records.pop(entry['student_id'], None)
+
+
+class StudentJournal:
+    def __init__(self, snapshot_path, max_records=10000, max_bytes=16 * 1024 * 1024, fsync=False, lock=None):
+        self.snapshot_path = snapshot_path
+        self.fsync = fsync
+        # Cross-process FileLock, when several managers share these files
+        self.lock = lock
+        self.path = snapshot_path + '.log'
+        # Segment rotated out of the live log and waiting to be folded into the snapshot
+        self.pending_path = self.path + '.1'
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.record_count = 0
+        self.size = 0
+        self.snapshot_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._file = None
+        self._compactor = None
+    
+    def append(self, *entries):
+        data = ''.join(json.dumps(entry, separators=(',', ':')) + '\n' for entry in entries)
+        with self._lock:
+            if self._file is not None and not self._is_current(self._file):
+                # Another process rotated or checkpointed the log under us
+                self.close()
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.record_count += len(entries)
+            self.size += len(data)
+    
+    def _is_current(self, file):
+        try:
+            return os.path.samestat(os.fstat(file.fileno()), os.stat(self.path))
+        except FileNotFoundError:
+            return False
+    
+    def _read_segment(self, path):
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn tail from a crash mid-append; everything before it is intact
+                    break
+                yield entry
+    
+    def read(self):
+        yield from self._read_segment(self.pending_path)
+        yield from self._read_segment(self.path)
+    
+    def replay(self, records):
+        self.record_count = 0
+        for entry in self._read_segment(self.pending_path):
+            apply_entry(records, entry)
+        for entry in self._read_segment(self.path):
+            apply_entry(records, entry)
+            self.record_count += 1
+        self.size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return records
+    
+    def has_entries(self):
+        return os.path.exists(self.pending_path) or os.path.exists(self.path)
+    
+    def needs_compaction(self):
+        return (self.record_count >= self.max_records or self.size >= self.max_bytes
+                or os.path.exists(self.pending_path))
+    
+    def rotate(self):
+        with self._lock:
+            if os.path.exists(self.pending_path) or not os.path.exists(self.path):
+                return False
+            self.close()
+            os.replace(self.path, self.pending_path)
+            self.record_count = 0
+            self.size = 0
+            return True
+    
+    def compact(self):
+        with self.lock or nullcontext(), self.snapshot_lock:
+            # A checkpoint may have superseded the rotated segment while we waited
+            if not os.path.exists(self.pending_path):
+                return False
+            records = load_snapshot(self.snapshot_path)
+            for entry in self._read_segment(self.pending_path):
+                apply_entry(records, entry)
+            write_snapshot(self.snapshot_path, records.values(), fsync=self.fsync)
+            os.remove(self.pending_path)
+            return True
+    
+    def compact_async(self):
+        if self._compactor is not None and self._compactor.is_alive():
+            return False
+        if not os.path.exists(self.pending_path) and not self.rotate():
+            return False
+        self._compactor = threading.Thread(target=self.compact, daemon=True)
+        self._compactor.start()
+        return True
+    
+    def checkpoint(self, records):
+        with self.snapshot_lock:
+            write_snapshot(self.snapshot_path, records, fsync=self.fsync)
+            with self._lock:
+                self.close()
+                for path in (self.pending_path, self.path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                self.record_count = 0
+                self.size = 0
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
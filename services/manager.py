@@ -1,55 +1,379 @@
 import json
+import math
 import os
 import csv
+import atexit
+import threading
+from contextlib import contextmanager
+from functools import wraps
 from datetime import datetime, timedelta
-from models.student import Student, StudentValidator, PerformanceStatus, Grade
+from models.student import Student, StudentValidator, PerformanceStatus, Grade, performance_status
+from services.columnar import ColumnarSnapshot
+from services.indexes import (AggregateCube, CategoryIndex, FuzzyIndex, RunningTotals, SketchIndex, SortedIndex,
+                              TokenIndex, TrigramIndex)
+from services.journal import StudentJournal
+from services.storage import (FileLock, SQLiteStudentStore, ShardedStudentStore, file_stamp, is_columnar,
+                              iter_snapshot, load_snapshot, write_snapshot)
+from services.student_list import LazyStudentList, RecordSource, StudentList
+
+# Derived indexes: name -> (index type, source field, key applied to the field value)
+INDEXES = {
+    'grade': (CategoryIndex, 'grade', None),
+    'department': (CategoryIndex, 'department', None),
+    'course': (CategoryIndex, 'course', None),
+    'status': (CategoryIndex, 'performance', performance_status),
+    'age': (SortedIndex, 'age', None),
+    'performance': (SortedIndex, 'performance', None),
+    # Dates are ISO strings, so text order is date order; records without one sort first
+    'enrollment_date': (SortedIndex, 'enrollment_date', lambda value: value or ''),
+    'last_updated': (SortedIndex, 'last_updated', lambda value: value or ''),
+    # Free-text fields; course and department are searched through their category indexes
+    'text': (TrigramIndex, ('name', 'email', 'phone'), lambda value: (value or '').lower()),
+    # Ranked search; a name hit outweighs an email hit, which outweighs course or department
+    'tokens': (TokenIndex, ('name', 'email', 'course', 'department'), (3.0, 2.0, 1.0, 1.0)),
+    'names': (FuzzyIndex, 'name', None),
+    'name': (SortedIndex, 'name', lambda value: (value or '').lower()),
+    'totals': (RunningTotals, ('age', 'performance', 'grade', 'course', 'department'), performance_status),
+    'performance_sketch': (SketchIndex, ('performance', 'department'), None),
+    'cube': (AggregateCube, ('department', 'course', 'grade', 'performance', 'age'), performance_status),
+}
+PERCENTILE_BANDS = (10, 25, 50, 75, 90)
+SORT_ORDERS = ('name', 'age', 'performance', 'enrollment_date', 'last_updated')
+
+def exclusive(method):
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._exclusive():
+            return method(self, *args, **kwargs)
+    return wrapper
 
 class StudentManager:
-    def __init__(self, data_file='data/students.json'):
+    def __init__(self, data_file='data/students.json', journal=False, compact_after=10000, backend='json',
+                 fsync=False, autosave_delay=None, snapshot_format='json', streaming=False, progress=None,
+                 shard_by='department', shard_count=16, shard_workers=None, shard_pool='process', lazy=False,
+                 shared=False):
         self.data_file = data_file
-        self.students = []
-        self.load_students()
+        self.students = StudentList()
+        self.fsync = fsync
+        # Parse students.json one record at a time instead of json.load()-ing the whole array
+        self.streaming = streaming
+        # Keep raw records and build a Student only when something asks for it
+        self.lazy = lazy
+        if snapshot_format == 'columnar':
+            self.snapshot_file = os.path.splitext(data_file)[0] + '.col'
+        elif snapshot_format == 'json':
+            self.snapshot_file = data_file
+        else:
+            raise ValueError(f"Unknown snapshot format: {snapshot_format}")
+        # Several processes (e.g. Streamlit workers) writing the same files serialize on an advisory lock
+        self.lock = FileLock(os.path.splitext(data_file)[0] + '.lock') if shared else None
+        if shared and autosave_delay:
+            raise ValueError("Debounced autosave can't be combined with shared data files")
+        self._stamp = None
+        self.journal = StudentJournal(self.snapshot_file, max_records=compact_after, fsync=fsync,
+                                      lock=self.lock) if journal else None
+        self.db = None
+        self.shards = None
+        self._pending = None
+        self._transaction_ok = True
+        self._touched = {}
+        # Built on first use and kept in step with every mutation until the roster is reloaded
+        self._indexes = {}
+        self._db_version = None
+        # Debounced autosave: a burst of mutations within the window costs one snapshot write
+        self.autosave_delay = autosave_delay
+        self._dirty = False
+        self._save_timer = None
+        self._save_lock = threading.RLock()
+        if autosave_delay:
+            atexit.register(self.flush)
+        if backend == 'sqlite':
+            self.db = SQLiteStudentStore(os.path.splitext(data_file)[0] + '.db')
+        elif backend == 'sharded':
+            # One file per department (or student_id hash bucket) under data/students/
+            self.shards = ShardedStudentStore(os.path.splitext(data_file)[0], shard_by=shard_by,
+                                              shard_count=shard_count, fsync=fsync, workers=shard_workers,
+                                              pool=shard_pool)
+        elif backend != 'json':
+            raise ValueError(f"Unknown storage backend: {backend}")
+        if backend != 'json' and (journal or lazy or snapshot_format != 'json'):
+            raise ValueError("Journal, lazy loading and snapshot formats are only supported with the json backend")
+        if self.lock:
+            with self.lock:
+                self.load_students(progress)
+                self._stamp = self._file_stamp()
+        else:
+            self.load_students(progress)
+    
+    def _file_stamp(self):
+        if self.db:
+            return None
+        if self.shards:
+            return self.shards.stamp()
+        if self.journal:
+            return file_stamp(self.snapshot_file, self.journal.pending_path, self.journal.path)
+        return file_stamp(self.snapshot_file)
     
-    def load_students(self):
+    def refresh(self):
+        # Cheap stat-based check; reloads only when another process changed the files
+        if self.lock is None:
+            return False
+        with self.lock:
+            stamp = self._file_stamp()
+            if stamp == self._stamp:
+                return False
+            self.load_students()
+            self._stamp = stamp
+            return True
+    
+    @contextmanager
+    def _exclusive(self):
+        if self.lock is None or self.lock.owned():
+            yield
+            return
+        with self.lock:
+            self.refresh()
+            try:
+                yield
+            finally:
+                self._stamp = self._file_stamp()
+    
+    def load_students(self, progress=None):
+        self._indexes = {}
+        # The file being parsed, so a corrupt one is the file moved aside
+        source = self.snapshot_file
         try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as file:
-                    data = json.load(file)
-                    self.students = [Student.from_dict(student_data) for student_data in data]
-            else:
+            if not os.path.exists(self.data_file):
                 os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-                self.students = []
-        except (json.JSONDecodeError, FileNotFoundError):
-            self.students = []
+            if self.db:
+                # Rows stay on disk; only seed a brand-new database from the JSON roster
+                if self.db.needs_seed() and os.path.exists(self.data_file):
+                    source = self.data_file
+                    self.db.insert_many(iter_snapshot(self.data_file, self.streaming, progress))
+                self.db.mark_seeded()
+                return
+            if self.shards:
+                if not self.shards.exists() and os.path.exists(self.data_file):
+                    source = self.data_file
+                    self.students = StudentList(Student.from_dict(student_data) for student_data
+                                                in iter_snapshot(self.data_file, self.streaming, progress))
+                    self.shards.index(self.students, dirty=True)
+                    self.shards.write_dirty()
+                else:
+                    self.students = StudentList(self.shards.load(Student.from_dict))
+                return
+            if (is_columnar(self.snapshot_file) and not os.path.exists(self.snapshot_file)
+                    and os.path.exists(self.data_file)):
+                # First columnar run: convert the JSON roster once
+                source = self.data_file
+                write_snapshot(self.snapshot_file, load_snapshot(self.data_file).values(), fsync=self.fsync)
+                source = self.snapshot_file
+            mappable = is_columnar(self.snapshot_file) and os.path.exists(self.snapshot_file)
+            if self.journal:
+                # Hold the snapshot steady so a finishing compaction can't drop the rotated segment
+                with self.journal.snapshot_lock:
+                    if mappable and not self.journal.has_entries():
+                        self.students = LazyStudentList(ColumnarSnapshot(self.snapshot_file))
+                        return
+                    records = self.journal.replay(load_snapshot(self.snapshot_file, self.streaming, progress))
+                if self.journal.needs_compaction():
+                    self.journal.compact_async()
+            elif mappable:
+                self.students = LazyStudentList(ColumnarSnapshot(self.snapshot_file))
+                return
+            elif self.lazy:
+                # Always stream here: json.load() would hold every record as a dict while the columns fill
+                self.students = LazyStudentList(RecordSource(iter_snapshot(self.snapshot_file, True, progress)))
+                return
+            else:
+                # Hydrate straight from the parser so no intermediate list of records is kept
+                self.students = StudentList(Student.from_dict(student_data) for student_data
+                                            in iter_snapshot(self.snapshot_file, self.streaming, progress))
+                return
+            if self.lazy:
+                self.students = LazyStudentList(RecordSource(records.values()))
+                return
+            self.students = StudentList(Student.from_dict(student_data) for student_data in records.values())
+        except json.JSONDecodeError:
+            # Keep the unreadable roster aside so the next save can't overwrite it
+            if os.path.exists(source):
+                os.replace(source, source + '.corrupt')
+            self.students = StudentList()
+        except FileNotFoundError:
+            self.students = StudentList()
     
+    @exclusive
     def save_students(self):
+        if self.db:
+            return True
         try:
-            with open(self.data_file, 'w') as file:
-                json.dump([student.to_dict() for student in self.students], file, indent=2)
+            if self.shards:
+                self.shards.write_dirty()
+            elif self.journal:
+                # The snapshot now holds every logged mutation
+                self.journal.checkpoint(self.students.records())
+            else:
+                write_snapshot(self.snapshot_file, self.students.records(), fsync=self.fsync)
             return True
         except Exception as e:
             return False
     
-    def export_to_csv(self, filename='data/students_export.csv'):
+    def flush(self):
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty:
+                return True
+            if self._pending is not None:
+                # The open transaction may still roll back; save once it has finished
+                return self._schedule_save()
+            self._dirty = False
+            if self.save_students():
+                return True
+            self._dirty = True
+            return False
+    
+    def _schedule_save(self):
+        with self._save_lock:
+            self._dirty = True
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(self.autosave_delay, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+        return True
+    
+    def _persist(self, *entries):
+        if self.db:
+            try:
+                self.db.apply(entries, commit=self._pending is None)
+                return True
+            except Exception as e:
+                # The indexes were already moved to match; rebuild them from the rolled-back rows
+                self._indexes = {}
+                if self._pending is not None:
+                    self._transaction_ok = False
+                return False
+        if self._pending is not None:
+            self._pending.extend(entries)
+            return True
+        if not self.journal and self.autosave_delay:
+            if self.shards:
+                self.shards.apply(entries, self.get_student)
+            return self._schedule_save()
+        return self._write(*entries)
+    
+    def _write(self, *entries):
+        if self.shards:
+            self.shards.apply(entries, self.get_student)
+        if not self.journal:
+            return self.save_students()
+        if not entries:
+            return True
+        try:
+            self.journal.append(*entries)
+            if self.journal.needs_compaction():
+                self.journal.compact_async()
+            return True
+        except Exception as e:
+            return False
+    
+    @contextmanager
+    def transaction(self):
+        if self._pending is not None:
+            # Nested blocks join the outermost transaction
+            yield self
+            return
+        
+        # Holding the save lock keeps the autosave timer from snapshotting a half-finished transaction
+        with self._exclusive(), self._save_lock:
+            self._pending = []
+            self._transaction_ok = True
+            self._touched = {}
+            students = self.students.copy()
+            try:
+                yield self
+                entries, self._pending = self._pending, None
+                if not self._transaction_ok:
+                    raise RuntimeError("Failed to save transaction")
+                if self.db:
+                    self.db.commit()
+                elif entries and not self._write(*entries):
+                    raise RuntimeError("Failed to save transaction")
+            except BaseException:
+                self._pending = None
+                if self.db:
+                    self.db.rollback()
+                self.students = students
+                for student, attributes in self._touched.values():
+                    student.__dict__.update(attributes)
+                self._indexes = {}
+                if self.shards:
+                    self.shards.index(self.students)
+                raise
+            finally:
+                self._touched = {}
+    
+    def _remember(self, student):
+        if self._pending is not None and id(student) not in self._touched:
+            self._touched[id(student)] = (student, dict(student.__dict__))
+    
+    def _index(self, name):
+        if self.db:
+            version = self.db.data_version()
+            if version != self._db_version:
+                self._indexes = {}
+                self._db_version = version
+        index = self._indexes.get(name)
+        if index is None:
+            index_type, field, key = INDEXES[name]
+            index = index_type(field, key)
+            if isinstance(field, tuple):
+                values = zip(*[self._column(name) for name in field])
+            else:
+                values = self._column(field)
+            index.build(self._column('student_id'), values)
+            self._indexes[name] = index
+        return index
+    
+    def _index_add(self, record):
+        for index in self._indexes.values():
+            index.add(record)
+    
+    def _index_remove(self, record):
+        for index in self._indexes.values():
+            index.remove(record)
+    
+    def _lookup(self, student_ids):
+        return [self.get_student(student_id) for student_id in student_ids]
+    
+    def export_to_csv(self, filename='data/students_export.csv', since=None):
         try:
             os.makedirs(os.path.dirname(filename), exist_ok=True)
+            # A delta export only writes students changed at or after `since`
+            records = self._records() if since is None else (
+                student.to_dict() for student in self.get_students_changed_since(since))
             with open(filename, 'w', newline='', encoding='utf-8') as file:
-                if self.students:
-                    fieldnames = self.students[0].to_dict().keys()
-                    writer = csv.DictWriter(file, fieldnames=fieldnames)
-                    writer.writeheader()
-                    for student in self.students:
-                        writer.writerow(student.to_dict())
+                writer = None
+                for record in records:
+                    if writer is None:
+                        writer = csv.DictWriter(file, fieldnames=record.keys())
+                        writer.writeheader()
+                    writer.writerow(record)
             return True, f"Data exported successfully to {filename}"
         except Exception as e:
             return False, f"Error exporting data: {e}"
     
+    @exclusive
     def import_from_csv(self, filename):
+        added_ids = []
         try:
             with open(filename, 'r', encoding='utf-8') as file:
                 reader = csv.DictReader(file)
                 imported_count = 0
                 errors = []
+                imported = []
+                imported_ids = set()
                 
                 for i, row in enumerate(reader, 2):
                     validation_errors = StudentValidator.validate_student_data(row)
@@ -57,130 +381,285 @@ class StudentManager:
                         errors.append(f"Row {i}: {', '.join(validation_errors)}")
                         continue
                     
-                    student = Student.from_dict(row)
-                    if not any(s.student_id == student.student_id for s in self.students):
-                        self.students.append(student)
+                    student = Student.from_dict({**row, 'age': int(row['age']),
+                                                 'performance': float(row['performance'])})
+                    if student.student_id not in imported_ids and self.get_student(student.student_id) is None:
+                        if not self.db:
+                            self.students.append(student)
+                            added_ids.append(student.student_id)
+                        self._index_add(vars(student))
+                        imported_ids.add(student.student_id)
+                        imported.append({'op': 'add', 'student': student.to_dict()})
                         imported_count += 1
                 
-                if self.save_students():
+                if self._persist(*imported):
                     message = f"Successfully imported {imported_count} students"
                     if errors:
                         message += f". {len(errors)} rows had errors"
                     return True, message, errors
                 else:
+                    self._discard_imported(added_ids)
                     return False, "Failed to save imported data", errors
         except Exception as e:
+            self._discard_imported(added_ids)
             return False, f"Error importing data: {e}", []
     
+    def _discard_imported(self, student_ids):
+        self.students.remove_ids(student_ids)
+        # A failure can land halfway through an index update, so rebuild them rather than unwind
+        self._indexes = {}
+    
+    @exclusive
     def add_student(self, student):
-        if any(s.student_id == student.student_id for s in self.students):
+        if self.get_student(student.student_id) is not None:
             return False, "Student ID already exists"
         
-        self.students.append(student)
-        if self.save_students():
+        if not self.db:
+            self.students.append(student)
+        self._index_add(vars(student))
+        if self._persist({'op': 'add', 'student': student.to_dict()}):
             return True, "Student added successfully"
         else:
-            self.students.pop()
+            if not self.db:
+                self.students.pop()
+            self._index_remove(vars(student))
             return False, "Failed to save student data"
     
+    @exclusive
     def update_student(self, student_id, **kwargs):
-        for student in self.students:
-            if student.student_id == student_id:
-                for key, value in kwargs.items():
-                    if hasattr(student, key):
-                        setattr(student, key, value)
-                student.last_updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                if self.save_students():
-                    return True, "Student updated successfully"
-                else:
-                    return False, "Failed to save updated data"
-        return False, "Student not found"
+        student = self.get_student(student_id)
+        if student is None:
+            return False, "Student not found"
+        
+        self._remember(student)
+        previous = dict(vars(student))
+        fields = {}
+        for key, value in kwargs.items():
+            if hasattr(student, key):
+                setattr(student, key, value)
+                fields[key] = value
+        student.last_updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        fields['last_updated'] = student.last_updated
+        self._index_remove(previous)
+        self._index_add(vars(student))
+        if self._persist({'op': 'update', 'student_id': student_id, 'fields': fields}):
+            return True, "Student updated successfully"
+        else:
+            return False, "Failed to save updated data"
     
+    @exclusive
     def delete_student(self, student_id):
-        for i, student in enumerate(self.students):
-            if student.student_id == student_id:
-                del self.students[i]
-                if self.save_students():
-                    return True, "Student deleted successfully"
-                else:
-                    return False, "Failed to save after deletion"
-        return False, "Student not found"
+        student = self.get_student(student_id)
+        if student is None:
+            return False, "Student not found"
+        
+        if not self.db:
+            self.students.remove(student)
+        self._index_remove(vars(student))
+        if self._persist({'op': 'delete', 'student_id': student_id}):
+            return True, "Student deleted successfully"
+        else:
+            return False, "Failed to save after deletion"
     
     def get_student(self, student_id):
-        for student in self.students:
-            if student.student_id == student_id:
-                return student
-        return None
+        if self.db:
+            return self.db.get(student_id)
+        return self.students.get(student_id)
     
     def get_all_students(self):
+        if self.db:
+            return self.db.all()
         return self.students
     
-    def search_students(self, query):
+    def list_students(self, sort_by='name', cursor=None, limit=50, descending=False):
+        # Returns (page, next_cursor); pass next_cursor back for the following page, None means the end
+        if sort_by not in SORT_ORDERS:
+            raise ValueError(f"Can't sort students by {sort_by}")
+        if cursor is not None:
+            cursor = tuple(cursor)
+        if self.db:
+            return self.db.page(sort_by, cursor, limit, descending)
+        student_ids, next_cursor = self._index(sort_by).page(cursor, limit, descending)
+        return self._lookup(student_ids), next_cursor
+    
+    def _records(self):
+        if self.db:
+            return self.db.iter_records()
+        return self.students.records()
+    
+    def _column(self, name):
+        # Field values in roster order, read without building Student objects where the storage allows
+        if self.db:
+            return self.db.column(name)
+        return self.students.column(name)
+    
+    def search_students(self, query, ranked=False, limit=20, max_distance=None):
+        if max_distance is not None:
+            # Typo-tolerant name lookup, closest matches first
+            return self._lookup(self._index('names').search(query, max_distance))
+        if ranked:
+            # Best `limit` matches by score, without sorting the whole match set
+            return self._lookup([student_id for student_id, _ in self._index('tokens').search(query, limit)])
+        if self.db:
+            return self.db.search(query)
         query = query.lower()
-        return [student for student in self.students 
-                if (query in student.name.lower() or 
-                    query in student.email.lower() or
-                    query in student.course.lower() or
-                    query in student.department.lower() or
-                    query in student.phone)]
+        if len(query) < 3:
+            # Too short to have a trigram; scan
+            return self.students.select(
+                ('name', 'email', 'course', 'department', 'phone'),
+                lambda name, email, course, department, phone: (query in name.lower() or 
+                                                                query in email.lower() or
+                                                                query in course.lower() or
+                                                                query in department.lower() or
+                                                                query in phone))
+        
+        student_ids = {}
+        # Trigram candidates are verified against the real fields
+        for student in self._lookup(self._index('text').candidates(query)):
+            if query in student.name.lower() or query in student.email.lower() or query in student.phone:
+                student_ids[student.student_id] = None
+        contains = lambda value: query in value.lower()
+        student_ids.update(dict.fromkeys(self._index('course').match(contains)))
+        student_ids.update(dict.fromkeys(self._index('department').match(contains)))
+        return self._lookup(student_ids)
     
     def filter_by_grade(self, grade):
-        return [student for student in self.students if student.grade == grade]
+        if self.db:
+            return self.db.filter_by_grade(grade)
+        return self._lookup(self._index('grade').lookup(grade))
     
     def filter_by_age_range(self, min_age, max_age):
-        return [student for student in self.students 
-                if min_age <= student.age <= max_age]
+        if self.db:
+            return self.db.filter_by_range('age', min_age, max_age)
+        return self._lookup(self._index('age').range(min_age, max_age))
     
     def filter_by_performance(self, min_performance, max_performance=100):
-        return [student for student in self.students 
-                if min_performance <= student.performance <= max_performance]
+        if self.db:
+            return self.db.filter_by_range('performance', min_performance, max_performance)
+        return self._lookup(self._index('performance').range(min_performance, max_performance))
     
     def filter_by_status(self, status):
-        return [student for student in self.students if student.calculate_status() == status]
+        if self.db:
+            return self.db.filter_by_status(status)
+        return self._lookup(self._index('status').lookup(status))
     
     def filter_by_course(self, course):
-        return [student for student in self.students 
-                if course.lower() in student.course.lower()]
+        if self.db:
+            return self.db.filter_contains('course', course)
+        # Substring match over the distinct courses, then the matching postings
+        return self._lookup(self._index('course').match(lambda value: course.lower() in value.lower()))
     
     def filter_by_department(self, department):
-        return [student for student in self.students 
-                if department.lower() in student.department.lower()]
+        if self.db:
+            return self.db.filter_contains('department', department)
+        return self._lookup(self._index('department').match(lambda value: department.lower() in value.lower()))
+    
+    def _recent_cutoff(self, days):
+        return (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
     
     def filter_recently_added(self, days=7):
-        cutoff_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
-        return [student for student in self.students 
-                if student.enrollment_date >= cutoff_date]
+        return self._since('enrollment_date', self._recent_cutoff(days))
     
-    def get_statistics(self):
-        if not self.students:
-            return {}
+    def get_students_changed_since(self, timestamp):
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.strftime("%Y-%m-%d %H:%M:%S")
+        return self._since('last_updated', timestamp)
+    
+    def _since(self, field, value):
+        if self.db:
+            return self.db.filter_since(field, value)
+        return self._lookup(self._index(field).at_least(value))
+    
+    def query(self, search=None, grade=None, status=None, course=None, department=None, age=None,
+              performance=None, enrolled_since=None, updated_since=None, where=None):
+        if self.db:
+            students = self.db.query(search, grade, status, course, department, age, performance, enrolled_since,
+                                     updated_since)
+            return [student for student in students if where(student)] if where is not None else students
+        # Each filter is (test for one student, plan); a plan returns (match count, fetch ids) from an index
+        filters = []
+        if search:
+            text = search.lower()
+            filters.append((lambda student: (text in student.name.lower() or text in student.email.lower() or
+                                             text in student.course.lower() or text in student.department.lower() or
+                                             text in student.phone),
+                            lambda: (math.inf, lambda: [student.student_id for student in self.search_students(search)])))
+        if grade is not None:
+            filters.append((lambda student: student.grade == grade,
+                            lambda: self._category_plan('grade', lambda value: value == grade)))
+        if status is not None:
+            filters.append((lambda student: performance_status(student.performance) == status,
+                            lambda: self._category_plan('status', lambda value: value == status)))
+        if course is not None:
+            filters.append((lambda student: course.lower() in student.course.lower(),
+                            lambda: self._category_plan('course', lambda value: course.lower() in value.lower())))
+        if department is not None:
+            filters.append((lambda student: department.lower() in student.department.lower(),
+                            lambda: self._category_plan('department',
+                                                        lambda value: department.lower() in value.lower())))
+        if age is not None:
+            filters.append((lambda student: age[0] <= student.age <= age[1],
+                            lambda: self._range_plan('age', *age)))
+        if performance is not None:
+            filters.append((lambda student: performance[0] <= student.performance <= performance[1],
+                            lambda: self._range_plan('performance', *performance)))
+        if enrolled_since is not None:
+            filters.append((lambda student: (student.enrollment_date or '') >= enrolled_since,
+                            lambda: self._range_plan('enrollment_date', enrolled_since)))
+        if updated_since is not None:
+            filters.append((lambda student: (student.last_updated or '') >= updated_since,
+                            lambda: self._range_plan('last_updated', updated_since)))
+        if where is not None:
+            filters.append((where, None))
         
-        total_students = len(self.students)
-        avg_age = sum(s.age for s in self.students) / total_students
-        avg_performance = sum(s.performance for s in self.students) / total_students
+        if not any(plan for _, plan in filters):
+            return [student for student in self.get_all_students() if all(test(student) for test, _ in filters)]
         
-        grade_distribution = {}
-        for grade in [g.value for g in Grade]:
-            grade_distribution[grade] = sum(1 for s in self.students if s.grade == grade)
+        residual = [test for test, plan in filters if plan is None]
+        planned = sorted(((plan(), test) for test, plan in filters if plan is not None), key=lambda item: item[0][0])
+        # Seed from the most selective index, intersect comparable id sets, test the rest per student
+        (_, fetch), _ = planned[0]
+        student_ids = fetch()
+        for (count, fetch), test in planned[1:]:
+            if count <= 4 * len(student_ids):
+                matching = set(fetch())
+                student_ids = [student_id for student_id in student_ids if student_id in matching]
+            else:
+                residual.append(test)
+        return [student for student in self._lookup(student_ids) if all(test(student) for test in residual)]
+    
+    def _category_plan(self, name, accept):
+        postings = [student_ids for value, student_ids in self._index(name).postings.items() if accept(value)]
+        return sum(map(len, postings)), lambda: [student_id for student_ids in postings for student_id in student_ids]
+    
+    def _range_plan(self, name, low, high=None):
+        index = self._index(name)
+        start, end = index.bounds(low, high)
+        return end - start, lambda: index.student_ids[start:end]
+    
+    def get_statistics(self):
+        # SQLite aggregates in the database; in-memory rosters keep running totals
+        totals = self.db.totals() if self.db else self._index('totals')
+        if not totals.count:
+            return {}
         
-        status_distribution = {}
-        for status in [s.value for s in PerformanceStatus]:
-            status_distribution[status] = len(self.filter_by_status(status))
+        total_students = totals.count
+        avg_age = totals.age_total / total_students
+        avg_performance = totals.performance_total / total_students
         
-        course_distribution = {}
-        department_distribution = {}
+        grade_distribution = {g.value: totals.grades.get(g.value, 0) for g in Grade}
+        status_distribution = {s.value: totals.statuses.get(s.value, 0) for s in PerformanceStatus}
+        course_distribution = dict(totals.courses)
+        department_distribution = dict(totals.departments)
         performance_trend = []
         
-        for student in self.students:
-            course = student.course or "Undeclared"
-            department = student.department or "Undeclared"
-            
-            course_distribution[course] = course_distribution.get(course, 0) + 1
-            department_distribution[department] = department_distribution.get(department, 0) + 1
-        
-        recent_students = self.filter_recently_added(30)
-        if recent_students:
-            recent_avg = sum(s.performance for s in recent_students) / len(recent_students)
+        if self.db:
+            recent_count, recent_total = self.db.sum_since('enrollment_date', self._recent_cutoff(30), 'performance')
+        else:
+            recent_performances = [student.performance for student in self.filter_recently_added(30)]
+            recent_count, recent_total = len(recent_performances), sum(recent_performances)
+        if recent_count:
+            recent_avg = recent_total / recent_count
             performance_trend = ["improving" if recent_avg > avg_performance else "declining" if recent_avg < avg_performance else "stable"]
         
         return {
@@ -192,18 +671,23 @@ class StudentManager:
             'course_distribution': course_distribution,
             'department_distribution': department_distribution,
             'performance_trend': performance_trend,
-            'top_performer': max(self.students, key=lambda x: x.performance) if self.students else None,
-            'recent_additions': len(recent_students)
+            'top_performer': self.get_top_performers(1)[0],
+            'recent_additions': recent_count
         }
     
+    def get_rollup(self, dimensions=(), **filters):
+        # Cross-tabs over department, course, grade and status, read from the materialized cube
+        return self._index('cube').rollup(dimensions, **filters)
+    
     def get_next_student_id(self):
-        if not self.students:
+        student_ids = self._column('student_id')
+        if not student_ids:
             return "STU001"
         
         numbers = []
-        for student in self.students:
+        for student_id in student_ids:
             try:
-                num = int(student.student_id[3:])
+                num = int(student_id[3:])
                 numbers.append(num)
             except ValueError:
                 continue
@@ -211,24 +695,51 @@ class StudentManager:
         next_num = max(numbers) + 1 if numbers else 1
         return f"STU{next_num:03d}"
     
+    @exclusive
     def bulk_delete_students(self, student_ids):
-        initial_count = len(self.students)
-        self.students = [s for s in self.students if s.student_id not in student_ids]
-        deleted_count = initial_count - len(self.students)
+        removed = []
+        if self._indexes:
+            removed = [vars(student) for student in map(self.get_student, dict.fromkeys(student_ids))
+                       if student is not None]
+        if self.db:
+            deleted = [student_id for student_id in dict.fromkeys(student_ids) if self.db.exists(student_id)]
+        else:
+            deleted = self.students.remove_ids(set(student_ids))
+        for record in removed:
+            self._index_remove(record)
+        deleted_count = len(deleted)
         
-        if self.save_students():
+        if self._persist(*[{'op': 'delete', 'student_id': student_id} for student_id in deleted]):
             return True, f"Successfully deleted {deleted_count} students"
         else:
             return False, "Failed to save after bulk deletion"
     
+    def get_performance_percentile(self, percentile):
+        index = self._index('performance')
+        if not len(index):
+            return None
+        return index.percentile(percentile)
+    
+    def get_performance_percentiles(self, departments=None, percentiles=PERCENTILE_BANDS):
+        # Read from bounded histogram sketches; departments are merged on the fly
+        sketch = self._index('performance_sketch').sketch(departments)
+        values = sketch.quantiles([percentile / 100 for percentile in percentiles])
+        return {f"p{percentile}": value for percentile, value in zip(percentiles, values)}
+    
+    def get_top_performers(self, limit=10):
+        if self.db:
+            return self.db.top('performance', limit)
+        return self._lookup(self._index('performance').top(limit))
+    
     def get_performance_analysis(self):
-        if not self.students:
+        index = self._index('performance')
+        if not len(index):
             return {}
         
-        performances = [s.performance for s in self.students]
         return {
-            'max_performance': max(performances),
-            'min_performance': min(performances),
-            'median_performance': sorted(performances)[len(performances)//2],
-            'pass_rate': (sum(1 for s in self.students if s.performance >= 60) / len(self.students)) * 100
+            'max_performance': index.nth(-1),
+            'min_performance': index.nth(0),
+            'median_performance': index.nth(len(index)//2),
+            'pass_rate': (index.count_at_least(60) / len(index)) * 100,
+            'percentiles': self.get_performance_percentiles()
         }
\ No newline at end of file
@@ -0,0 +1,535 @@
+import codecs
+import json
+import os
+import re
+import sqlite3
+import stat
+import tempfile
+import zlib
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from types import SimpleNamespace
+from models.student import Student, performance_status, status_bounds
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+from services.columnar import ColumnarSnapshot, write_columnar
+
+
+class FileLock:
+    # Advisory lock shared by every process using the same data files; re-entrant within a thread
+    def __init__(self, path):
+        if fcntl is None:
+            # Without flock the lock would exclude nothing, so refuse rather than corrupt shared files
+            raise ValueError("Shared data files need fcntl file locking, which this platform doesn't provide")
+        self.path = path
+        self.depth = 0
+        self._owner = None
+        self._file = None
+        self._lock = threading.RLock()
+    
+    def owned(self):
+        return self.depth > 0 and self._owner == threading.get_ident()
+    
+    def __enter__(self):
+        self._lock.acquire()
+        if self.depth == 0:
+            self._owner = threading.get_ident()
+            self._file = open(self.path, 'a')
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        self.depth += 1
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.depth -= 1
+        if self.depth == 0:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+            self._owner = None
+        self._lock.release()
+
+
+def file_stamp(*paths):
+    stamp = []
+    for path in paths:
+        try:
+            info = os.stat(path)
+            stamp.append((path, info.st_mtime_ns, info.st_size))
+        except FileNotFoundError:
+            stamp.append((path, None, None))
+    return tuple(stamp)
+
+
+def atomic_write(path, write, fsync=True, binary=False):
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb' if binary else 'w') as file:
+            write(file)
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+        os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode) if os.path.exists(path) else 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if fsync and hasattr(os, 'O_DIRECTORY'):
+        # Make the rename itself durable, not just the file contents
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def atomic_write_json(path, data, fsync=True, indent=2):
+    atomic_write(path, lambda file: json.dump(data, file, indent=indent), fsync=fsync)
+
+
+def is_columnar(path):
+    return path.endswith('.col')
+
+
+def iter_json_array(file, chunk_size=64 * 1024, progress=None):
+    # Parses a top-level JSON array one element at a time, holding at most a chunk plus one element
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    total_bytes = os.fstat(file.fileno()).st_size
+    bytes_read = 0
+    buffer = ''
+    pos = 0
+    eof = False
+    
+    def read_more():
+        nonlocal buffer, pos, bytes_read, eof
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        bytes_read += len(chunk)
+        buffer = buffer[pos:] + utf8.decode(chunk, final=eof)
+        pos = 0
+        if progress:
+            progress(bytes_read, total_bytes)
+        return not eof
+    
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buffer) or not read_more():
+                return
+    
+    skip_whitespace()
+    if buffer[pos:pos + 1] != '[':
+        raise json.JSONDecodeError("Expecting '['", buffer, pos)
+    pos += 1
+    skip_whitespace()
+    if buffer[pos:pos + 1] == ']':
+        return
+    while True:
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                # A value that runs to the end of the buffer might continue in the next chunk
+                if end < len(buffer) or eof:
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            read_more()
+        pos = end
+        yield value
+        skip_whitespace()
+        separator = buffer[pos:pos + 1]
+        pos += 1
+        if separator == ']':
+            return
+        if separator != ',':
+            raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos - 1)
+        skip_whitespace()
+
+
+def iter_snapshot(path, streaming=False, progress=None):
+    if not os.path.exists(path):
+        return
+    if is_columnar(path):
+        yield from ColumnarSnapshot(path)
+    elif streaming:
+        with open(path, 'rb') as file:
+            yield from iter_json_array(file, progress=progress)
+    else:
+        with open(path, 'r') as file:
+            yield from json.load(file)
+
+
+def load_snapshot(path, streaming=False, progress=None):
+    records = {}
+    for student_data in iter_snapshot(path, streaming, progress):
+        records[student_data['student_id']] = student_data
+    return records
+
+
+def write_snapshot(path, records, fsync=True):
+    if is_columnar(path):
+        atomic_write(path, lambda file: write_columnar(file, records), fsync=fsync, binary=True)
+    else:
+        atomic_write_json(path, list(records), fsync=fsync)
+
+
+STUDENT_COLUMNS = ('student_id', 'name', 'age', 'grade', 'email', 'performance', 'phone',
+                   'course', 'department', 'enrollment_date', 'last_updated')
+
+
+class SQLiteStudentStore:
+    RANGE_COLUMNS = ('age', 'performance', 'enrollment_date', 'last_updated')
+    TEXT_COLUMNS = ('course', 'department')
+    SORT_KEYS = {'name': "lower(name)", 'age': "age", 'performance': "performance",
+                 'enrollment_date': "coalesce(enrollment_date, '')", 'last_updated': "coalesce(last_updated, '')"}
+    
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS students (
+                student_id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                age INTEGER NOT NULL,
+                grade TEXT NOT NULL,
+                email TEXT NOT NULL,
+                performance REAL NOT NULL,
+                phone TEXT DEFAULT '',
+                course TEXT DEFAULT '',
+                department TEXT DEFAULT '',
+                enrollment_date TEXT,
+                last_updated TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_students_grade ON students (grade);
+            DROP INDEX IF EXISTS idx_students_age;
+            DROP INDEX IF EXISTS idx_students_performance;
+            DROP INDEX IF EXISTS idx_students_enrollment_date;
+            DROP INDEX IF EXISTS idx_students_last_updated;
+        """)
+        # One index per sort key, on the same expression the queries use and ending in student_id, so pages,
+        # since-filters and top-N walk an index instead of sorting into a temp B-tree
+        for column, key in self.SORT_KEYS.items():
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_students_{column}_order ON students ({key}, student_id)")
+        self._insert_sql = "INSERT INTO students ({}) VALUES ({})".format(
+            ', '.join(STUDENT_COLUMNS), ', '.join('?' * len(STUDENT_COLUMNS)))
+    
+    def _to_student(self, row):
+        return Student.from_dict(dict(row))
+    
+    def _query(self, sql, params=()):
+        return [self._to_student(row) for row in self.conn.execute(sql, params)]
+    
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+    
+    def get(self, student_id):
+        row = self.conn.execute("SELECT * FROM students WHERE student_id = ?", (student_id,)).fetchone()
+        return self._to_student(row) if row else None
+    
+    def exists(self, student_id):
+        return self.conn.execute("SELECT 1 FROM students WHERE student_id = ?", (student_id,)).fetchone() is not None
+    
+    def all(self):
+        return self._query("SELECT * FROM students ORDER BY rowid")
+    
+    def column(self, name):
+        if name not in STUDENT_COLUMNS:
+            raise ValueError(f"Unknown column {name}")
+        return [row[0] for row in self.conn.execute(f"SELECT {name} FROM students ORDER BY rowid")]
+    
+    def iter_records(self):
+        for row in self.conn.execute("SELECT * FROM students ORDER BY rowid"):
+            yield dict(row)
+    
+    def filter_by_grade(self, grade):
+        return self._query("SELECT * FROM students WHERE grade = ? ORDER BY rowid", (grade,))
+    
+    def filter_by_range(self, column, low, high):
+        if column not in self.RANGE_COLUMNS:
+            raise ValueError(f"No range index on {column}")
+        return self._query(f"SELECT * FROM students WHERE {column} BETWEEN ? AND ? ORDER BY rowid", (low, high))
+    
+    def filter_since(self, column, value):
+        if column not in self.RANGE_COLUMNS:
+            raise ValueError(f"No range index on {column}")
+        key = self.SORT_KEYS[column]
+        return self._query(f"SELECT * FROM students WHERE {key} >= ? ORDER BY {key}, student_id", (value,))
+    
+    def search(self, query):
+        return self.query(search=query)
+    
+    def filter_by_status(self, status):
+        return self.query(status=status)
+    
+    def filter_contains(self, column, text):
+        if column not in self.TEXT_COLUMNS:
+            raise ValueError(f"No substring filter on {column}")
+        return self.query(**{column: text})
+    
+    def query(self, search=None, grade=None, status=None, course=None, department=None, age=None,
+              performance=None, enrolled_since=None, updated_since=None):
+        # The filters of StudentManager.query as one parameterized WHERE clause, so SQLite picks the index
+        conditions, params = [], []
+        if search:
+            conditions.append("(instr(lower(name), ?) OR instr(lower(email), ?) OR instr(lower(course), ?) "
+                              "OR instr(lower(department), ?) OR instr(phone, ?))")
+            params.extend([search.lower()] * 5)
+        if grade is not None:
+            conditions.append("grade = ?")
+            params.append(grade)
+        if status is not None:
+            bounds = status_bounds(status)
+            if bounds is None:
+                return []
+            for operator, bound in zip(('>=', '<'), bounds):
+                if bound is not None:
+                    conditions.append(f"performance {operator} ?")
+                    params.append(bound)
+        for column, text in (('course', course), ('department', department)):
+            if text is not None:
+                conditions.append(f"instr(lower({column}), ?)")
+                params.append(text.lower())
+        for column, bounds in (('age', age), ('performance', performance)):
+            if bounds is not None:
+                conditions.append(f"{column} BETWEEN ? AND ?")
+                params.extend(bounds)
+        for column, value in (('enrollment_date', enrolled_since), ('last_updated', updated_since)):
+            if value is not None:
+                conditions.append(f"{self.SORT_KEYS[column]} >= ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        return self._query(f"SELECT * FROM students {where}ORDER BY rowid", params)
+    
+    def top(self, column, limit):
+        if column not in self.RANGE_COLUMNS:
+            raise ValueError(f"No range index on {column}")
+        return self._query(f"SELECT * FROM students ORDER BY {column} DESC, student_id DESC LIMIT ?", (limit,))
+    
+    def _counts(self, expression):
+        return self.conn.execute(f"SELECT {expression}, COUNT(*) FROM students GROUP BY 1").fetchall()
+    
+    def totals(self):
+        # Same shape as RunningTotals, aggregated in SQL rather than read row by row
+        count, age_total, performance_total = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(age), 0), COALESCE(SUM(performance), 0) FROM students").fetchone()
+        statuses = {}
+        # Scores are few distinct values, so bucketing them here keeps the status thresholds in one place
+        for performance, number in self._counts("performance"):
+            status = performance_status(performance)
+            statuses[status] = statuses.get(status, 0) + number
+        return SimpleNamespace(
+            count=count, age_total=age_total, performance_total=performance_total,
+            grades=dict(self._counts("grade")), statuses=statuses,
+            courses=dict(self._counts("coalesce(nullif(course, ''), 'Undeclared')")),
+            departments=dict(self._counts("coalesce(nullif(department, ''), 'Undeclared')")))
+    
+    def sum_since(self, column, value, field):
+        if column not in self.RANGE_COLUMNS or field not in STUDENT_COLUMNS:
+            raise ValueError(f"Can't sum {field} since {column}")
+        return tuple(self.conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM({field}), 0) FROM students WHERE {self.SORT_KEYS[column]} >= ?",
+            (value,)).fetchone())
+    
+    def page(self, column, cursor=None, limit=50, descending=False):
+        if column not in self.SORT_KEYS:
+            raise ValueError(f"Can't sort by {column}")
+        key = self.SORT_KEYS[column]
+        order, after = ('DESC', '<') if descending else ('ASC', '>')
+        where, params = "", ()
+        if cursor is not None and key == column:
+            where, params = f"WHERE ({key}, student_id) {after} (?, ?) ", cursor
+        elif cursor is not None:
+            # SQLite only seeks a row value on plain columns; on an expression key, range on the key alone
+            where = f"WHERE {key} {after}= ? AND ({key} {after} ? OR student_id {after} ?) "
+            params = (cursor[0], *cursor)
+        rows = self.conn.execute(
+            f"SELECT {key} AS sort_key, * FROM students {where}ORDER BY {key} {order}, student_id {order} LIMIT ?",
+            (*params, limit + 1)).fetchall()
+        next_cursor = (rows[limit - 1]['sort_key'], rows[limit - 1]['student_id']) if len(rows) > limit else None
+        return [self._to_student(row) for row in rows[:limit]], next_cursor
+    
+    def data_version(self):
+        # Moves only when another connection commits, so caches survive this connection's own writes
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    def needs_seed(self):
+        # user_version marks a database that has already taken the JSON roster, so an emptied table stays empty
+        return self.conn.execute("PRAGMA user_version").fetchone()[0] == 0 and self.count() == 0
+    
+    def mark_seeded(self):
+        self.conn.execute("PRAGMA user_version = 1")
+        self.conn.commit()
+    
+    def insert_many(self, records):
+        with self.conn:
+            self.conn.executemany(self._insert_sql, (
+                tuple(record.get(column, '') for column in STUDENT_COLUMNS) for record in records))
+    
+    def apply(self, entries, commit=True):
+        # One transaction per call, so a batch of entries lands atomically
+        try:
+            for entry in entries:
+                op = entry['op']
+                if op == 'add':
+                    record = entry['student']
+                    self.conn.execute(self._insert_sql, tuple(record.get(column, '') for column in STUDENT_COLUMNS))
+                elif op == 'update':
+                    fields = {key: value for key, value in entry['fields'].items() if key in STUDENT_COLUMNS}
+                    assignments = ', '.join(f"{key} = ?" for key in fields)
+                    self.conn.execute(f"UPDATE students SET {assignments} WHERE student_id = ?",
+                                      (*fields.values(), entry['student_id']))
+                elif op == 'delete':
+                    self.conn.execute("DELETE FROM students WHERE student_id = ?", (entry['student_id'],))
+        except Exception:
+            self.conn.rollback()
+            raise
+        if commit:
+            self.conn.commit()
+    
+    def commit(self):
+        self.conn.commit()
+    
+    def rollback(self):
+        self.conn.rollback()
+    
+    def close(self):
+        self.conn.close()
+
+
+def _read_shard(path):
+    key = os.path.splitext(os.path.basename(path))[0]
+    try:
+        with open(path, 'r') as file:
+            return key, json.load(file)
+    except json.JSONDecodeError:
+        # Reported rather than raised, so one bad shard doesn't sink the whole (parallel) load
+        return key, None
+
+
+class ShardedStudentStore:
+    def __init__(self, directory, shard_by='department', shard_count=16, fsync=False, workers=None, pool='process'):
+        if shard_by not in ('department', 'hash'):
+            raise ValueError(f"Unknown shard key: {shard_by}")
+        if pool not in ('process', 'thread'):
+            raise ValueError(f"Unknown pool type: {pool}")
+        self.directory = directory
+        # Outlives the last shard file, so an emptied roster isn't re-split from the legacy JSON
+        self.marker = os.path.join(directory, '.migrated')
+        self.shard_by = shard_by
+        self.shard_count = shard_count
+        self.fsync = fsync
+        self.workers = workers
+        self.pool = pool
+        self.shards = {}
+        self.shard_of = {}
+        self.dirty = set()
+    
+    def shard_key(self, student):
+        if self.shard_by == 'hash':
+            return f"bucket_{zlib.crc32(student.student_id.encode('utf-8')) % self.shard_count:03d}"
+        department = student.department or "Undeclared"
+        slug = re.sub(r'[^a-z0-9]+', '_', department.lower()).strip('_') or 'department'
+        # The checksum keeps departments that slugify alike in separate files
+        return f"{slug}_{zlib.crc32(department.encode('utf-8')):08x}"
+    
+    def path(self, key):
+        return os.path.join(self.directory, key + '.json')
+    
+    def _paths(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                      if name.endswith('.json'))
+    
+    def exists(self):
+        return os.path.exists(self.marker) or bool(self._paths())
+    
+    def stamp(self):
+        return file_stamp(self.directory, *self._paths())
+    
+    def load(self, hydrate):
+        paths = self._paths()
+        if len(paths) <= 1 or self.workers == 1:
+            shards = map(_read_shard, paths)
+        else:
+            executor_class = ProcessPoolExecutor if self.pool == 'process' else ThreadPoolExecutor
+            with executor_class(max_workers=self.workers) as executor:
+                shards = list(executor.map(_read_shard, paths))
+        self.shards = {}
+        self.shard_of = {}
+        students = []
+        for key, records in shards:
+            if records is None:
+                # Keep the unreadable shard aside so the next save can't overwrite it
+                os.replace(self.path(key), self.path(key) + '.corrupt')
+                continue
+            self.shards.setdefault(key, {})
+            for student_data in records:
+                student = hydrate(student_data)
+                students.append(student)
+                # Records filed under another key (e.g. shard_count changed) get rewritten on next save
+                placed = self._place(student)
+                if placed != key:
+                    self.dirty.update((key, placed))
+        return students
+    
+    def _place(self, student):
+        key = self.shard_key(student)
+        self.shards.setdefault(key, {})[student.student_id] = student
+        self.shard_of[student.student_id] = key
+        return key
+    
+    def _unplace(self, student_id):
+        key = self.shard_of.pop(student_id, None)
+        if key is not None:
+            self.shards[key].pop(student_id, None)
+        return key
+    
+    def index(self, students, dirty=False):
+        self.shards = {}
+        self.shard_of = {}
+        for student in students:
+            self._place(student)
+        if dirty:
+            self.dirty.update(self.shards)
+    
+    def apply(self, entries, lookup):
+        student_ids = set()
+        for entry in entries:
+            if entry['op'] == 'add':
+                student_ids.add(entry['student']['student_id'])
+            else:
+                student_ids.add(entry['student_id'])
+                student_ids.add(entry.get('fields', {}).get('student_id', entry['student_id']))
+        # Re-place each touched student from its live object, so moves between shards dirty both ends
+        for student_id in student_ids:
+            old_key = self._unplace(student_id)
+            student = lookup(student_id)
+            new_key = self._place(student) if student is not None else None
+            self.dirty.update(key for key in (old_key, new_key) if key is not None)
+    
+    def write_dirty(self):
+        os.makedirs(self.directory, exist_ok=True)
+        for key in sorted(self.dirty):
+            students = self.shards.get(key)
+            if students:
+                atomic_write_json(self.path(key), [student.to_dict() for student in students.values()],
+                                  fsync=self.fsync)
+            else:
+                if os.path.exists(self.path(key)):
+                    os.remove(self.path(key))
+                self.shards.pop(key, None)
+            self.dirty.discard(key)
+        if not os.path.exists(self.marker):
+            open(self.marker, 'w').close()
@@ -0,0 +1,256 @@
+from array import array
+from itertools import islice
+from models.student import Student
+from services.columnar import NUMERIC_COLUMNS, RECORD_FIELDS, STRING_COLUMNS, string_defaults
+
+
+class StudentList(list):
+    # A list that also keeps a student_id -> Student index in step with every mutation
+    def __init__(self, students=()):
+        super().__init__(students)
+        self._by_id = {student.student_id: student for student in self}
+    
+    def _reindex(self):
+        self._by_id = {student.student_id: student for student in self}
+    
+    def append(self, student):
+        super().append(student)
+        self._by_id[student.student_id] = student
+    
+    def extend(self, students):
+        super().extend(students)
+        self._reindex()
+    
+    def insert(self, index, student):
+        super().insert(index, student)
+        self._by_id[student.student_id] = student
+    
+    def remove(self, student):
+        super().remove(student)
+        self._by_id.pop(student.student_id, None)
+    
+    def pop(self, index=-1):
+        student = super().pop(index)
+        self._by_id.pop(student.student_id, None)
+        return student
+    
+    def clear(self):
+        super().clear()
+        self._by_id = {}
+    
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._reindex()
+    
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._reindex()
+    
+    def __iadd__(self, students):
+        self.extend(students)
+        return self
+    
+    def get(self, student_id):
+        return self._by_id.get(student_id)
+    
+    def column(self, name):
+        return [getattr(student, name) for student in self]
+    
+    def records(self):
+        for student in self:
+            yield student.to_dict()
+    
+    def select(self, fields, predicate):
+        return [student for student in self if predicate(*[getattr(student, name) for name in fields])]
+    
+    def remove_ids(self, student_ids):
+        removed = [student_id for student_id in dict.fromkeys(student_ids) if student_id in self._by_id]
+        if removed:
+            super().__setitem__(slice(None), [student for student in self if student.student_id not in student_ids])
+            for student_id in removed:
+                del self._by_id[student_id]
+        return removed
+    
+    def copy(self):
+        return StudentList(self)
+
+
+class RecordSource:
+    # Raw records packed the way a columnar snapshot lays them out: typed numeric arrays plus
+    # codes into one interned string table, so unloaded rows cost a few bytes per field
+    def __init__(self, records):
+        self.columns = {name: array(code) for name, code, _ in NUMERIC_COLUMNS}
+        self.columns.update((name, array('I')) for name in STRING_COLUMNS)
+        numeric = [(name, self.columns[name].append, convert) for name, _, convert in NUMERIC_COLUMNS]
+        defaults = string_defaults()
+        text = [(name, self.columns[name].append, defaults.get(name, '')) for name in STRING_COLUMNS]
+        codes = {}
+        self.rows = 0
+        for record in records:
+            for name, append, convert in numeric:
+                append(convert(record.get(name) or 0))
+            for name, append, default in text:
+                append(codes.setdefault(record.get(name) or default, len(codes)))
+            self.rows += 1
+        self.strings = list(codes)
+    
+    def __len__(self):
+        return self.rows
+    
+    def value(self, name, row):
+        if name in STRING_COLUMNS:
+            return self.strings[self.columns[name][row]]
+        return self.columns[name][row]
+    
+    def column(self, name):
+        if name not in STRING_COLUMNS:
+            return self.columns[name]
+        return list(map(self.strings.__getitem__, self.columns[name]))
+    
+    def record(self, row):
+        return {name: self.value(name, row) for name in RECORD_FIELDS}
+
+
+class LazyStudentList:
+    # Rows stay in their source (raw records or a mapped snapshot) until something touches them
+    def __init__(self, source):
+        self.source = source
+        self._hydrated = {}
+        self._row_of = {}
+        self._deleted = set()
+        self._appended = []
+        # student_id -> source row or appended Student, built on the first lookup
+        self._by_id = None
+    
+    def _hydrate(self, row):
+        student = self._hydrated.get(row)
+        if student is None:
+            student = Student.from_dict(self.source.record(row))
+            self._hydrated[row] = student
+            self._row_of[id(student)] = row
+        return student
+    
+    def _rows(self):
+        for row in range(len(self.source)):
+            if row not in self._deleted:
+                yield row
+    
+    def __len__(self):
+        return len(self.source) - len(self._deleted) + len(self._appended)
+    
+    def __iter__(self):
+        for row in self._rows():
+            yield self._hydrate(row)
+        yield from list(self._appended)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("student index out of range")
+        return next(islice(iter(self), index, None))
+    
+    def _index(self):
+        if self._by_id is None:
+            ids = self.source.column('student_id')
+            self._by_id = {}
+            for row in self._rows():
+                student = self._hydrated.get(row)
+                self._by_id[student.student_id if student else ids[row]] = row
+            for student in self._appended:
+                self._by_id[student.student_id] = student
+        return self._by_id
+    
+    def append(self, student):
+        self._appended.append(student)
+        if self._by_id is not None:
+            self._by_id[student.student_id] = student
+    
+    def pop(self):
+        if self._appended:
+            return self._appended.pop()
+        student = self[-1]
+        self.remove(student)
+        return student
+    
+    def remove(self, student):
+        row = self._row_of.get(id(student))
+        if row is not None and self._hydrated.get(row) is student and row not in self._deleted:
+            self._deleted.add(row)
+            self._forget(student.student_id)
+            return
+        for i, appended in enumerate(self._appended):
+            if appended is student:
+                del self._appended[i]
+                self._forget(student.student_id)
+                return
+        raise ValueError("student not in list")
+    
+    def _forget(self, student_id):
+        if self._by_id is not None:
+            self._by_id.pop(student_id, None)
+    
+    def get(self, student_id):
+        entry = self._index().get(student_id)
+        if entry is None or isinstance(entry, Student):
+            return entry
+        return self._hydrate(entry)
+    
+    def column(self, name):
+        if not self._hydrated and not self._deleted and not self._appended:
+            return self.source.column(name)
+        values = self.source.column(name)
+        column = [getattr(self._hydrated[row], name) if row in self._hydrated else values[row]
+                  for row in self._rows()]
+        column.extend(getattr(student, name) for student in self._appended)
+        return column
+    
+    def records(self):
+        for row in self._rows():
+            if row in self._hydrated:
+                yield self._hydrated[row].to_dict()
+            else:
+                yield self.source.record(row)
+        for student in self._appended:
+            yield student.to_dict()
+    
+    def select(self, fields, predicate):
+        # Tests raw field values and hydrates only the matching rows
+        columns = [self.source.column(name) for name in fields]
+        matches = []
+        for row in self._rows():
+            if row in self._hydrated:
+                student = self._hydrated[row]
+                values = [getattr(student, name) for name in fields]
+            else:
+                values = [column[row] for column in columns]
+            if predicate(*values):
+                matches.append(self._hydrate(row))
+        matches.extend(student for student in self._appended
+                       if predicate(*[getattr(student, name) for name in fields]))
+        return matches
+    
+    def remove_ids(self, student_ids):
+        removed = []
+        by_id = self._index()
+        for student_id in dict.fromkeys(student_ids):
+            entry = by_id.pop(student_id, None)
+            if entry is None:
+                continue
+            if isinstance(entry, Student):
+                self._appended.remove(entry)
+            else:
+                self._deleted.add(entry)
+            removed.append(student_id)
+        return removed
+    
+    def copy(self):
+        students = LazyStudentList(self.source)
+        students._hydrated = dict(self._hydrated)
+        students._row_of = dict(self._row_of)
+        students._deleted = set(self._deleted)
+        students._appended = list(self._appended)
+        students._by_id = dict(self._by_id) if self._by_id is not None else None
+        return students
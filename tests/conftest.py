@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# The services and models packages live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from support import BACKENDS, populate
+
+
+@pytest.fixture(params=list(BACKENDS))
+def backend(request, tmp_path):
+    # A populated manager for every storage mode, with the path and options needed to reopen it
+    options = BACKENDS[request.param]
+    path = str(tmp_path / 'students.json')
+    return populate(path, options), path, options
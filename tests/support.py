@@ -0,0 +1,118 @@
+import importlib.util
+import os
+import random
+
+from models.student import Student
+from services.manager import StudentManager
+
+BACKENDS = {
+    'json': {},
+    'streaming': {'streaming': True},
+    'lazy': {'lazy': True},
+    'journal': {'journal': True},
+    'columnar': {'snapshot_format': 'columnar'},
+    'autosave': {'autosave_delay': 0.05},
+    'sharded': {'backend': 'sharded'},
+    'sqlite': {'backend': 'sqlite'},
+}
+COURSES = ('Mathematics', 'Physics', 'Art History', '')
+DEPARTMENTS = ('Science', 'Humanities', '')
+NAMES = ('Ann Lee', 'Bob Ray', 'Carla Diaz', 'Dan Smith', 'Eve Stone', 'Jon Smith')
+FIRST = ('ann', 'anna', 'bob', 'bobby', 'carl', 'karla', 'dana', 'jon', 'john')
+LAST = ('lee', 'leigh', 'smith', 'smyth', 'stone', 'ray')
+
+
+def make_student(i, rng):
+    return Student(f"STU{i:04d}", rng.choice(NAMES), rng.randint(16, 40), rng.choice('ABCDF'),
+                   f"student{i}@example.com", round(rng.uniform(0, 100), 1), f"555-{i:04d}",
+                   rng.choice(COURSES), rng.choice(DEPARTMENTS), rng.choice(('2020-09-01', '2024-01-15', None)))
+
+
+def populate(path, options, count=120, seed=7):
+    manager = StudentManager(path, **options)
+    rng = random.Random(seed)
+    for i in range(count):
+        manager.add_student(make_student(i, rng))
+    return manager
+
+
+def mutate(manager, rng):
+    for i in range(0, 120, 9):
+        manager.update_student(f"STU{i:04d}", grade=rng.choice('ABC'), performance=round(rng.uniform(0, 100), 1),
+                               course=rng.choice(COURSES))
+    manager.delete_student("STU0001")
+    manager.bulk_delete_students(["STU0002", "STU0003", "STU9999"])
+    manager.add_student(make_student(500, rng))
+
+
+def roster(manager):
+    return {student.student_id: (student.name, student.age, student.grade, student.performance, student.course,
+                                 student.department)
+            for student in manager.get_all_students()}
+
+
+def reopen(manager, path, options):
+    manager.flush()
+    return StudentManager(path, **options)
+
+
+def check_reopen_after_mutation(tmp_path, options):
+    path = str(tmp_path / 'students.json')
+    manager = populate(path, options)
+    mutate(manager, random.Random(1))
+    expected = roster(manager)
+    assert len(expected) == 118
+    assert roster(reopen(manager, path, options)) == expected
+
+
+def ids(students):
+    return sorted(student.student_id for student in students)
+
+
+def make_record(student_id, rng):
+    return {
+        'student_id': student_id,
+        'name': f"{rng.choice(FIRST)} {rng.choice(LAST)}".title(),
+        'email': f"{student_id.lower()}@example.com",
+        'phone': f"555-{rng.randrange(10000):04d}",
+        'age': rng.randint(16, 40),
+        'grade': rng.choice('ABCDF'),
+        'performance': round(rng.uniform(0, 100), 1),
+        'course': rng.choice(COURSES),
+        'department': rng.choice(DEPARTMENTS),
+    }
+
+
+def churn(index, steps=600, seed=0):
+    # Random adds, updates and removes applied to the index the way the manager does; returns the live records
+    rng = random.Random(seed)
+    live = {f"S{i:04d}": make_record(f"S{i:04d}", rng) for i in range(150)}
+    fields = index.fields if isinstance(getattr(index, 'fields', None), tuple) else (index.field,)
+    values = [tuple(record[name] for name in fields) for record in live.values()]
+    index.build(list(live), values if len(fields) > 1 else [value for value, in values])
+    next_id = len(live)
+    for _ in range(steps):
+        roll = rng.random()
+        if roll < 0.2 or not live:
+            student_id = f"S{next_id:04d}"
+            next_id += 1
+            live[student_id] = make_record(student_id, rng)
+            index.add(live[student_id])
+            continue
+        student_id = rng.choice(list(live))
+        index.remove(live[student_id])
+        if roll < 0.85:
+            live[student_id] = make_record(student_id, rng)
+            index.add(live[student_id])
+        else:
+            del live[student_id]
+    return live
+
+
+def load_ui():
+    # ui/app.py is a Streamlit script rather than a package module; its classes load without a running app
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ui', 'app.py')
+    spec = importlib.util.spec_from_file_location('ui_app', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
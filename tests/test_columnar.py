@@ -0,0 +1,47 @@
+import os
+import random
+
+import pytest
+
+from services.columnar import ColumnarSnapshot
+from services.manager import StudentManager
+from services.storage import write_snapshot
+from support import check_reopen_after_mutation, make_student, roster
+
+
+@pytest.mark.parametrize('options', [{'snapshot_format': 'columnar'},
+                                     {'snapshot_format': 'columnar', 'journal': True}])
+def test_reopen_after_mutation(tmp_path, options):
+    check_reopen_after_mutation(tmp_path, options)
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / 'students.col')
+    rng = random.Random(1)
+    records = [make_student(i, rng).to_dict() for i in range(200)]
+    write_snapshot(path, records, fsync=False)
+    snapshot = ColumnarSnapshot(path)
+    assert len(snapshot) == len(records)
+    assert [snapshot.record(row)['student_id'] for row in range(len(records))] == [r['student_id'] for r in records]
+    assert list(snapshot.column('performance')) == [r['performance'] for r in records]
+    assert snapshot.column('course') == [r['course'] for r in records]
+
+
+def test_converts_the_json_roster_once(tmp_path):
+    path = str(tmp_path / 'students.json')
+    seed = StudentManager(path)
+    rng = random.Random(2)
+    for i in range(10):
+        seed.add_student(make_student(i, rng))
+    manager = StudentManager(path, snapshot_format='columnar')
+    assert os.path.exists(str(tmp_path / 'students.col'))
+    assert roster(manager) == roster(seed)
+
+
+def test_corrupt_json_during_conversion_is_moved_aside(tmp_path):
+    path = str(tmp_path / 'students.json')
+    with open(path, 'w') as file:
+        file.write('[{"student_id": "STU0001", ')
+    assert roster(StudentManager(path, snapshot_format='columnar')) == {}
+    assert os.path.exists(path + '.corrupt')
+    assert roster(StudentManager(path, snapshot_format='columnar')) == {}
@@ -0,0 +1,33 @@
+from services.manager import StudentManager
+
+HEADER = "student_id,name,age,grade,email,performance,course,department\n"
+
+
+def test_csv_import_converts_numbers(tmp_path):
+    csv_file = tmp_path / 'import.csv'
+    csv_file.write_text(HEADER +
+                        "STU0800,Ann Lee,20,A,ann@example.com,88.5,Physics,Science\n"
+                        "STU0801,Bob Ray,21,B,bob@example.com,70,History,Humanities\n")
+    manager = StudentManager(str(tmp_path / 'students.json'))
+    manager.filter_by_grade('A')
+    ok, _, errors = manager.import_from_csv(str(csv_file))
+    assert ok and not errors
+    student = manager.get_student("STU0800")
+    assert student.age == 20 and student.performance == 88.5
+    assert [s.student_id for s in manager.filter_by_grade('A')] == ["STU0800"]
+    assert [s.student_id for s in manager.filter_by_status('Average')] == ["STU0801"]
+
+
+def test_failed_csv_import_is_undone(tmp_path):
+    csv_file = tmp_path / 'import.csv'
+    csv_file.write_text(HEADER + "STU0800,Ann Lee,20,A,ann@example.com,88.5,Physics,Science\n")
+    manager = StudentManager(str(tmp_path / 'students.json'))
+    manager.filter_by_grade('A')
+    
+    def fail(*entries):
+        raise OSError("disk full")
+    manager._persist = fail
+    ok, _, _ = manager.import_from_csv(str(csv_file))
+    assert not ok
+    assert manager.get_student("STU0800") is None
+    assert manager.filter_by_grade('A') == []
@@ -0,0 +1,131 @@
+import math
+
+import pytest
+
+from models.student import performance_status
+from services.indexes import (AggregateCube, CategoryIndex, FuzzyIndex, QuantileSketch, RunningTotals, SketchIndex,
+                              SortedIndex, TokenIndex, TrigramIndex, edit_distance, tokenize)
+from support import COURSES, churn
+
+
+def test_category_index_matches_scan():
+    index = CategoryIndex('performance', performance_status)
+    live = churn(index)
+    for status in ('Excellent', 'Good', 'Average', 'Needs Improvement'):
+        assert sorted(index.lookup(status)) == sorted(
+            student_id for student_id, record in live.items() if performance_status(record['performance']) == status)
+    assert sum(index.counts().values()) == len(live)
+
+
+def test_sorted_index_matches_scan():
+    index = SortedIndex('performance')
+    live = churn(index)
+    ordered = sorted((record['performance'], student_id) for student_id, record in live.items())
+    assert list(zip(index.values, index.student_ids)) == ordered
+    assert sorted(index.range(30, 60)) == sorted(
+        student_id for student_id, record in live.items() if 30 <= record['performance'] <= 60)
+    assert index.count_at_least(60) == sum(1 for record in live.values() if record['performance'] >= 60)
+    assert index.top(3) == [student_id for _, student_id in ordered[:-4:-1]]
+    for percentile in (1, 25, 50, 90, 100):
+        rank = max(1, math.ceil(percentile / 100 * len(ordered)))
+        assert index.percentile(percentile) == ordered[rank - 1][0]
+
+
+def test_trigram_index_candidates_match_scan():
+    index = TrigramIndex(('name', 'email', 'phone'), lambda value: (value or '').lower())
+    live = churn(index, steps=2000)
+    # Compaction keeps retired docs from outnumbering live ones
+    assert len(index.student_ids) <= 2 * len(live) + 1
+    for query in ('ann', 'smi', 'rla l', '555-01', 'example'):
+        found = set(index.candidates(query))
+        containing = {student_id for student_id, record in live.items()
+                      if any(query in record[name].lower() for name in ('name', 'email', 'phone'))}
+        assert containing <= found
+        grams = {query[i:i + 3] for i in range(len(query) - 2)}
+        assert found == {student_id for student_id, record in live.items()
+                         if all(any(gram in record[name].lower() for name in ('name', 'email', 'phone'))
+                                for gram in grams)}
+
+
+def test_token_index_matches_scan():
+    index = TokenIndex(('name', 'email', 'course', 'department'), (3.0, 2.0, 1.0, 1.0))
+    live = churn(index)
+    tokens = {student_id: [tokenize(record[name]) for name in index.fields] for student_id, record in live.items()}
+    for query, accept in (('smith', lambda words: 'smith' in words),
+                          ('ann smith', lambda words: 'ann' in words and 'smith' in words),
+                          ('bob', lambda words: any(word.startswith('bob') for word in words)),
+                          ('karla ', lambda words: 'karla' in words)):
+        results = index.search(query, limit=len(live))
+        assert sorted(student_id for student_id, _ in results) == sorted(
+            student_id for student_id, fields in tokens.items() if accept([word for field in fields for word in field]))
+        scores = [score for _, score in results]
+        assert scores == sorted(scores, reverse=True)
+    assert index.documents == len(live)
+
+
+def test_fuzzy_index_matches_scan():
+    index = FuzzyIndex('name')
+    live = churn(index)
+    for query, max_distance in (('jon smyth', 1), ('karl', 1), ('ane', 2)):
+        expected = {}
+        for student_id, record in live.items():
+            words = tokenize(record['name'])
+            distances = [min(edit_distance(token, word) for word in words) for token in tokenize(query)]
+            if all(distance <= max_distance for distance in distances):
+                expected[student_id] = sum(distances)
+        found = index.search(query, max_distance)
+        assert sorted(found) == sorted(expected)
+        assert [expected[student_id] for student_id in found] == sorted(expected.values())
+
+
+def test_running_totals_match_scan():
+    index = RunningTotals(('age', 'performance', 'grade', 'course', 'department'), performance_status)
+    live = churn(index)
+    records = list(live.values())
+    assert index.count == len(records)
+    assert index.age_total == sum(record['age'] for record in records)
+    assert index.performance_total == pytest.approx(sum(record['performance'] for record in records))
+    for grade in 'ABCDF':
+        assert index.grades.get(grade, 0) == sum(1 for record in records if record['grade'] == grade)
+    for course in COURSES:
+        assert index.courses.get(course or "Undeclared", 0) == sum(1 for record in records if record['course'] == course)
+
+
+def test_sketch_index_is_within_half_a_bin():
+    index = SketchIndex(('performance', 'department'))
+    live = churn(index)
+    for departments in (None, ['Science'], ['Science', 'Humanities']):
+        values = sorted(record['performance'] for record in live.values()
+                        if departments is None or record['department'] in departments)
+        fractions = [0.1, 0.5, 0.9]
+        for fraction, estimate in zip(fractions, index.sketch(departments).quantiles(fractions)):
+            exact = values[max(1, math.ceil(fraction * len(values))) - 1]
+            assert abs(estimate - exact) <= 0.05 + 1e-9
+
+
+def test_quantile_sketch_merge_and_empty():
+    assert QuantileSketch().quantiles([0.5]) == [None]
+    left, right = QuantileSketch(), QuantileSketch()
+    for value in range(0, 50):
+        left.add(value)
+    for value in range(50, 100):
+        right.add(value)
+    assert left.merge(right).quantiles([0.5, 1.0]) == [49.0, 99.0]
+
+
+def test_aggregate_cube_matches_scan():
+    index = AggregateCube(('department', 'course', 'grade', 'performance', 'age'), performance_status)
+    live = churn(index)
+    rollup = index.rollup(('department', 'grade'), status='Good')
+    expected = {}
+    for record in live.values():
+        if performance_status(record['performance']) == 'Good':
+            expected.setdefault((record['department'] or "Undeclared", record['grade']), []).append(record)
+    assert set(rollup) == set(expected)
+    for group, records in expected.items():
+        performances = [record['performance'] for record in records]
+        mean = sum(performances) / len(performances)
+        assert rollup[group]['count'] == len(records)
+        assert rollup[group]['performance_mean'] == pytest.approx(mean)
+        assert rollup[group]['performance_std'] == pytest.approx(
+            math.sqrt(sum((value - mean) ** 2 for value in performances) / len(performances)), abs=1e-3)
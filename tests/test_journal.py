@@ -0,0 +1,67 @@
+import json
+import os
+import random
+
+from services.manager import StudentManager
+from support import check_reopen_after_mutation, make_student, roster
+
+
+def test_reopen_after_mutation(tmp_path):
+    check_reopen_after_mutation(tmp_path, {'journal': True})
+
+
+def test_mutations_append_to_the_log(tmp_path):
+    path = str(tmp_path / 'students.json')
+    manager = StudentManager(path, journal=True)
+    rng = random.Random(1)
+    manager.add_student(make_student(1, rng))
+    manager.update_student("STU0001", grade='F')
+    manager.delete_student("STU0001")
+    assert not os.path.exists(path)
+    with open(path + '.log') as file:
+        assert [json.loads(line)['op'] for line in file] == ['add', 'update', 'delete']
+
+
+def test_torn_tail_is_ignored(tmp_path):
+    path = str(tmp_path / 'students.json')
+    manager = StudentManager(path, journal=True)
+    rng = random.Random(2)
+    manager.add_student(make_student(1, rng))
+    manager.add_student(make_student(2, rng))
+    manager.journal.close()
+    with open(path + '.log', 'a') as file:
+        file.write('{"op": "delete", "stud')
+    assert sorted(roster(StudentManager(path, journal=True))) == ["STU0001", "STU0002"]
+
+
+def test_rotate_compact_and_reload(tmp_path):
+    path = str(tmp_path / 'students.json')
+    manager = StudentManager(path, journal=True)
+    rng = random.Random(3)
+    for i in range(4):
+        manager.add_student(make_student(i, rng))
+    journal = manager.journal
+    assert journal.rotate()
+    assert os.path.exists(journal.pending_path) and not os.path.exists(journal.path)
+    assert journal.compact()
+    assert not os.path.exists(journal.pending_path)
+    # Later writes land in a fresh log on top of the compacted snapshot
+    manager.update_student("STU0001", grade='F')
+    with open(path) as file:
+        assert sorted(record['student_id'] for record in json.load(file)) == ["STU0000", "STU0001", "STU0002",
+                                                                                "STU0003"]
+    assert roster(StudentManager(path, journal=True)) == roster(manager)
+    assert StudentManager(path, journal=True).get_student("STU0001").grade == 'F'
+
+
+def test_background_compaction_after_threshold(tmp_path):
+    path = str(tmp_path / 'students.json')
+    manager = StudentManager(path, journal=True, compact_after=5)
+    rng = random.Random(4)
+    for i in range(12):
+        manager.add_student(make_student(i, rng))
+        if manager.journal._compactor is not None:
+            manager.journal._compactor.join()
+    assert os.path.exists(path)
+    assert manager.journal.record_count < 5
+    assert roster(StudentManager(path, journal=True)) == roster(manager)
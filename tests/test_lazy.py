@@ -0,0 +1,86 @@
+import json
+import random
+
+import pytest
+
+from models.student import Student
+from services.manager import StudentManager
+from services.student_list import LazyStudentList, RecordSource, StudentList
+from support import check_reopen_after_mutation, make_student
+
+
+@pytest.mark.parametrize('options', [{'lazy': True}, {'lazy': True, 'journal': True}])
+def test_reopen_after_mutation(tmp_path, options):
+    check_reopen_after_mutation(tmp_path, options)
+
+
+def make_records(count, seed=0):
+    rng = random.Random(seed)
+    return [make_student(i, rng).to_dict() for i in range(count)]
+
+
+def test_record_source_round_trip():
+    records = make_records(200)
+    source = RecordSource(iter(records))
+    assert len(source) == len(records)
+    assert [source.record(row) for row in range(len(records))] == records
+    assert list(source.column('age')) == [r['age'] for r in records]
+    assert source.column('course') == [r['course'] for r in records]
+
+
+def test_lazy_list_behaves_like_student_list():
+    records = make_records(100)
+    lazy = LazyStudentList(RecordSource(records))
+    eager = StudentList(Student.from_dict(record) for record in records)
+    for students in (lazy, eager):
+        students.get("STU0005").grade = 'F'
+        students.remove(students.get("STU0006"))
+        students.append(Student.from_dict(dict(records[0], student_id="STU9000")))
+        students.remove_ids(["STU0010", "STU0011", "STU9999"])
+    for name in ('student_id', 'grade', 'performance'):
+        assert list(lazy.column(name)) == list(eager.column(name))
+    assert list(lazy.records()) == list(eager.records())
+    predicate = lambda grade, performance: grade == 'F' or performance > 90
+    assert [s.student_id for s in lazy.select(('grade', 'performance'), predicate)] == \
+           [s.student_id for s in eager.select(('grade', 'performance'), predicate)]
+    assert [s.to_dict() for s in lazy] == [s.to_dict() for s in eager]
+
+
+def test_only_touched_rows_are_hydrated(tmp_path):
+    path = tmp_path / 'students.json'
+    records = make_records(50)
+    path.write_text(json.dumps(records))
+    manager = StudentManager(str(path), lazy=True)
+    assert manager.get_student("STU0007").to_dict() == records[7]
+    assert manager.filter_by_grade(records[3]['grade'])
+    assert len(manager.students._hydrated) < len(records)
+    assert [student.to_dict() for student in manager.get_all_students()] == records
+
+
+def test_sparse_records_hydrate_like_from_dict(tmp_path):
+    path = tmp_path / 'students.json'
+    records = [{key: value for key, value in record.items()
+                if key not in ('phone', 'course', 'department', 'enrollment_date', 'last_updated')}
+               for record in make_records(30)]
+    records[4]['name'] = "Ann Lee"
+    records[5]['course'] = None
+    path.write_text(json.dumps(records))
+    manager = StudentManager(str(path), lazy=True)
+    eager = StudentManager(str(path))
+    for query in ('ann', 'lee', 'example'):
+        assert [s.student_id for s in manager.search_students(query)] == \
+               [s.student_id for s in eager.search_students(query)]
+    assert manager.search_students('55') == []
+    assert manager.filter_by_course('') and len(manager.filter_recently_added(1)) == len(records)
+    manager.update_student("STU0004", grade='F')
+    manager.update_student("STU0007", enrollment_date='2001-01-01')
+    listed = []
+    cursor = None
+    while True:
+        page, cursor = manager.list_students('enrollment_date', cursor)
+        listed.extend(student.student_id for student in page)
+        if cursor is None:
+            break
+    assert sorted(listed) == sorted(record['student_id'] for record in records)
+    assert listed[0] == "STU0007"
+    assert len(manager.filter_recently_added(1)) == len(records) - 1
@@ -0,0 +1,68 @@
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from services import storage
+from services.manager import StudentManager
+from services.storage import FileLock
+from support import make_student, roster
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WRITER = '''
+import random, sys
+from services.manager import StudentManager
+sys.path.insert(0, 'tests')
+from support import make_student
+manager = StudentManager(sys.argv[1], shared=True, **eval(sys.argv[2]))
+rng = random.Random(int(sys.argv[3]))
+for i in range(int(sys.argv[3]), int(sys.argv[3]) + 20):
+    manager.add_student(make_student(i, rng))
+manager.update_student("STU0000", name="Zed Quux")
+'''
+
+
+def run_writer(path, options, start):
+    subprocess.run([sys.executable, '-c', WRITER, path, repr(options), str(start)], cwd=ROOT, check=True)
+
+
+def spawn_writer(path, options, start):
+    return subprocess.Popen([sys.executable, '-c', WRITER, path, repr(options), str(start)], cwd=ROOT)
+
+
+@pytest.mark.parametrize('options', [{}, {'journal': True}, {'backend': 'sharded'}])
+def test_refresh_sees_another_process(tmp_path, options):
+    path = str(tmp_path / 'students.json')
+    manager = StudentManager(path, shared=True, **options)
+    manager.add_student(make_student(0, random.Random(1)))
+    assert not manager.refresh()
+    run_writer(path, options, 100)
+    assert manager.refresh()
+    assert manager.get_student("STU0000").name == "Zed Quux"
+    assert len(roster(manager)) == 21
+    assert not manager.refresh()
+
+
+def test_concurrent_writers_lose_nothing(tmp_path):
+    path = str(tmp_path / 'students.json')
+    manager = StudentManager(path, shared=True, journal=True)
+    manager.add_student(make_student(0, random.Random(1)))
+    writers = [spawn_writer(path, {'journal': True}, start) for start in (100, 200, 300)]
+    for writer in writers:
+        assert writer.wait() == 0
+    manager.refresh()
+    assert len(roster(manager)) == 61
+    assert roster(StudentManager(path, journal=True)) == roster(manager)
+
+
+def test_shared_files_reject_autosave(tmp_path):
+    with pytest.raises(ValueError):
+        StudentManager(str(tmp_path / 'students.json'), shared=True, autosave_delay=0.1)
+
+
+def test_file_lock_requires_flock(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, 'fcntl', None)
+    with pytest.raises(ValueError):
+        FileLock(str(tmp_path / 'students.lock'))
@@ -0,0 +1,105 @@
+import random
+import sqlite3
+
+import pytest
+
+from services.indexes import SortedIndex
+from services.storage import SQLiteStudentStore
+from support import churn, mutate, populate
+
+SORT_KEYS = {
+    'name': lambda s: s.name.lower(),
+    'age': lambda s: s.age,
+    'performance': lambda s: s.performance,
+    'enrollment_date': lambda s: s.enrollment_date or '',
+    'last_updated': lambda s: s.last_updated or '',
+}
+
+
+def walk(manager, sort_by, limit, descending):
+    page, cursor, seen = None, None, []
+    while page is None or cursor is not None:
+        page, cursor = manager.list_students(sort_by, cursor, limit, descending)
+        assert len(page) <= limit
+        seen.extend(student.student_id for student in page)
+    return seen
+
+
+def test_index_pages_cover_the_order_once():
+    index = SortedIndex('performance')
+    live = churn(index)
+    ordered = [student_id for _, student_id in sorted((record['performance'], student_id)
+                                                      for student_id, record in live.items())]
+    for descending in (False, True):
+        cursor, seen = None, []
+        while True:
+            page, cursor = index.page(cursor, 40, descending)
+            seen.extend(page)
+            if cursor is None:
+                break
+        assert seen == (ordered[::-1] if descending else ordered)
+
+
+@pytest.mark.parametrize('sort_by', list(SORT_KEYS))
+def test_pages_match_a_sort(backend, sort_by):
+    manager, path, options = backend
+    mutate(manager, random.Random(6))
+    key = SORT_KEYS[sort_by]
+    ordered = [s.student_id for s in sorted(manager.get_all_students(), key=lambda s: (key(s), s.student_id))]
+    assert walk(manager, sort_by, 25, False) == ordered
+    assert walk(manager, sort_by, 7, True) == ordered[::-1]
+    assert walk(manager, sort_by, 1000, False) == ordered
+
+
+def test_cursor_survives_a_write_before_it(backend):
+    manager, path, options = backend
+    first, cursor = manager.list_students('performance', limit=10)
+    manager.delete_student(first[0].student_id)
+    following, _ = manager.list_students('performance', cursor, limit=10)
+    everything = [s.student_id for s in sorted(manager.get_all_students(), key=lambda s: (s.performance, s.student_id))]
+    assert [s.student_id for s in following] == everything[9:19]
+
+
+def test_unknown_sort_is_rejected(backend):
+    manager, path, options = backend
+    with pytest.raises(ValueError):
+        manager.list_students('email')
+
+
+class RecordingConnection:
+    def __init__(self, conn):
+        self.conn = conn
+        self.statements = []
+    
+    def execute(self, sql, params=()):
+        self.statements.append((sql, params))
+        return self.conn.execute(sql, params)
+
+
+@pytest.mark.parametrize('sort_by', list(SORT_KEYS))
+def test_sqlite_pages_walk_an_index(tmp_path, sort_by):
+    manager = populate(str(tmp_path / 'students.json'), {'backend': 'sqlite'})
+    store = manager.db
+    store.conn = RecordingConnection(store.conn)
+    for descending in (False, True):
+        walk(manager, sort_by, 25, descending)
+    if sort_by in store.RANGE_COLUMNS:
+        store.filter_since(sort_by, '2021' if 'date' in sort_by or sort_by == 'last_updated' else 30)
+    for sql, params in store.conn.statements:
+        plan = ' '.join(row[3] for row in store.conn.conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+        assert 'TEMP B-TREE' not in plan and 'USING INDEX' in plan, (sql, plan)
+
+
+def test_sqlite_drops_the_single_column_indexes(tmp_path):
+    path = str(tmp_path / 'students.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE students (student_id TEXT PRIMARY KEY, name TEXT NOT NULL, age INTEGER NOT NULL, "
+                 "grade TEXT NOT NULL, email TEXT NOT NULL, performance REAL NOT NULL, phone TEXT DEFAULT '', "
+                 "course TEXT DEFAULT '', department TEXT DEFAULT '', enrollment_date TEXT, last_updated TEXT)")
+    conn.execute("CREATE INDEX idx_students_age ON students (age)")
+    conn.execute("CREATE INDEX idx_students_performance ON students (performance)")
+    conn.close()
+    store = SQLiteStudentStore(path)
+    names = {row[0] for row in store.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert not names & {'idx_students_age', 'idx_students_performance'}
+    assert {f"idx_students_{column}_order" for column in SORT_KEYS} <= names
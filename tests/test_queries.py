@@ -0,0 +1,105 @@
+import random
+from datetime import datetime, timedelta
+
+from models.student import performance_status
+from services.manager import StudentManager
+from support import ids, make_student, mutate
+
+
+def scanner(manager):
+    students = manager.get_all_students()
+    return lambda predicate: sorted(student.student_id for student in students if predicate(student))
+
+
+def test_category_filters_match_a_scan(backend):
+    manager, path, options = backend
+    mutate(manager, random.Random(6))
+    scan = scanner(manager)
+    for grade in 'ABCDF':
+        assert ids(manager.filter_by_grade(grade)) == scan(lambda s: s.grade == grade)
+    for status in ('Excellent', 'Good', 'Average', 'Needs Improvement'):
+        assert ids(manager.filter_by_status(status)) == scan(lambda s: performance_status(s.performance) == status)
+    assert ids(manager.filter_by_course('PHY')) == scan(lambda s: 'phy' in s.course.lower())
+    assert ids(manager.filter_by_department('hum')) == scan(lambda s: 'hum' in s.department.lower())
+
+
+def test_range_filters_match_a_scan(backend):
+    manager, path, options = backend
+    mutate(manager, random.Random(6))
+    scan = scanner(manager)
+    assert ids(manager.filter_by_age_range(18, 25)) == scan(lambda s: 18 <= s.age <= 25)
+    assert ids(manager.filter_by_performance(40.5, 61.5)) == scan(lambda s: 40.5 <= s.performance <= 61.5)
+    assert ids(manager.filter_by_performance(101)) == []
+    performances = sorted(s.performance for s in manager.get_all_students())
+    assert manager.get_top_performers(1)[0].performance == performances[-1]
+    analysis = manager.get_performance_analysis()
+    assert analysis['min_performance'] == performances[0] and analysis['max_performance'] == performances[-1]
+    assert analysis['median_performance'] == performances[len(performances) // 2]
+
+
+def test_since_filters_match_a_scan(backend):
+    manager, path, options = backend
+    mutate(manager, random.Random(6))
+    scan = scanner(manager)
+    for days in (7, 1500, 5000):
+        cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        assert ids(manager.filter_recently_added(days)) == scan(lambda s: (s.enrollment_date or '') >= cutoff)
+    changed = sorted(s.last_updated for s in manager.get_all_students())[len(manager.get_all_students()) // 2]
+    assert ids(manager.get_students_changed_since(changed)) == scan(lambda s: (s.last_updated or '') >= changed)
+    assert ids(manager.get_students_changed_since(datetime.now() + timedelta(days=1))) == []
+
+
+def test_substring_search_matches_a_scan(backend):
+    manager, path, options = backend
+    mutate(manager, random.Random(6))
+    scan = scanner(manager)
+    for query in ('smith', 'ta', 'example.com', '555-00', 'x'):
+        text = query.lower()
+        assert ids(manager.search_students(query)) == scan(
+            lambda s: any(text in value.lower() for value in (s.name, s.email, s.course, s.department, s.phone)))
+
+
+def test_ranked_search_matches_a_scan(backend):
+    manager, path, options = backend
+    mutate(manager, random.Random(6))
+    scan = scanner(manager)
+    ranked = manager.search_students('smith', ranked=True, limit=200)
+    assert ids(ranked) == scan(lambda s: 'smith' in s.name.lower().split())
+    assert len(manager.search_students('smith', ranked=True, limit=5)) == 5
+
+
+def test_fuzzy_search_matches_a_scan(backend):
+    manager, path, options = backend
+    mutate(manager, random.Random(6))
+    scan = scanner(manager)
+    assert ids(manager.search_students('jon smyth', max_distance=1)) == scan(lambda s: s.name == 'Jon Smith')
+    assert ids(manager.search_students('carla diaz', max_distance=0)) == scan(lambda s: s.name == 'Carla Diaz')
+
+
+def test_sqlite_sees_another_connections_writes(tmp_path):
+    path = str(tmp_path / 'students.json')
+    manager = StudentManager(path, backend='sqlite')
+    other = StudentManager(path, backend='sqlite')
+    rng = random.Random(9)
+    manager.add_student(make_student(1, rng))
+    assert manager.search_students('zed quux', max_distance=0) == []
+    other.update_student("STU0001", name="Zed Quux")
+    assert [s.student_id for s in manager.search_students('zed quux', max_distance=0)] == ["STU0001"]
+    assert [s.student_id for s in manager.search_students('quux', ranked=True)] == ["STU0001"]
+
+
+def test_query_matches_a_scan(backend):
+    manager, path, options = backend
+    mutate(manager, random.Random(6))
+    scan = scanner(manager)
+    assert ids(manager.query(grade='B', performance=(50, 100), course='a')) == scan(
+        lambda s: s.grade == 'B' and 50 <= s.performance <= 100 and 'a' in s.course.lower())
+    assert ids(manager.query(status='Good', department='sci', age=(18, 30))) == scan(
+        lambda s: performance_status(s.performance) == 'Good' and 'sci' in s.department.lower() and 18 <= s.age <= 30)
+    assert ids(manager.query(search='smith', enrolled_since='2024-01-01')) == scan(
+        lambda s: 'smith' in s.name.lower() and (s.enrollment_date or '') >= '2024-01-01')
+    assert ids(manager.query(grade='A', where=lambda s: s.age % 2 == 0)) == scan(
+        lambda s: s.grade == 'A' and s.age % 2 == 0)
+    assert ids(manager.query(where=lambda s: s.phone.endswith('7'))) == scan(lambda s: s.phone.endswith('7'))
+    assert ids(manager.query(grade='A', status='Excellent', updated_since='9999')) == []
+    assert ids(manager.query()) == scan(lambda s: True)
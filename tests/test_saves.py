@@ -0,0 +1,55 @@
+import json
+import os
+import random
+import time
+
+import pytest
+
+from services.manager import StudentManager
+from services.storage import atomic_write_json
+from support import check_reopen_after_mutation, make_student, roster
+
+
+@pytest.mark.parametrize('options', [{}, {'fsync': True}, {'autosave_delay': 0.05}])
+def test_reopen_after_mutation(tmp_path, options):
+    check_reopen_after_mutation(tmp_path, options)
+
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    path = str(tmp_path / 'students.json')
+    atomic_write_json(path, [{'student_id': 'STU0001'}])
+    with pytest.raises(TypeError):
+        atomic_write_json(path, [{'student_id': object()}])
+    with open(path) as file:
+        assert json.load(file) == [{'student_id': 'STU0001'}]
+    assert os.listdir(tmp_path) == ['students.json']
+
+
+def test_autosave_coalesces_a_burst(tmp_path):
+    path = str(tmp_path / 'students.json')
+    manager = StudentManager(path, autosave_delay=0.1)
+    saves = []
+    save_students = manager.save_students
+    manager.save_students = lambda: saves.append(None) or save_students()
+    rng = random.Random(1)
+    for i in range(20):
+        manager.add_student(make_student(i, rng))
+    assert not os.path.exists(path)
+    manager.flush()
+    assert len(saves) == 1
+    assert roster(StudentManager(path)) == roster(manager)
+
+
+def test_autosave_does_not_write_inside_a_transaction(tmp_path):
+    path = str(tmp_path / 'students.json')
+    manager = StudentManager(path, autosave_delay=0.05)
+    rng = random.Random(3)
+    manager.add_student(make_student(700, rng))
+    with pytest.raises(ValueError):
+        with manager.transaction():
+            manager.add_student(make_student(701, rng))
+            time.sleep(0.2)
+            manager.flush()
+            raise ValueError("abort")
+    time.sleep(0.2)
+    assert sorted(roster(StudentManager(path))) == ["STU0700"]
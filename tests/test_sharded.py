@@ -0,0 +1,77 @@
+import os
+import random
+
+import pytest
+
+from models.student import Student
+from services.manager import StudentManager
+from services.storage import ShardedStudentStore
+from support import check_reopen_after_mutation, make_student, roster
+
+
+@pytest.mark.parametrize('options', [{'backend': 'sharded'},
+                                     {'backend': 'sharded', 'shard_pool': 'thread'},
+                                     {'backend': 'sharded', 'shard_by': 'hash', 'shard_count': 4}])
+def test_reopen_after_mutation(tmp_path, options):
+    check_reopen_after_mutation(tmp_path, options)
+
+
+def test_department_change_moves_shards(tmp_path):
+    path = str(tmp_path / 'students.json')
+    manager = StudentManager(path, backend='sharded')
+    rng = random.Random(1)
+    for i in range(10):
+        manager.add_student(make_student(i, rng))
+    manager.update_student("STU0001", department="Astronomy")
+    key = manager.shards.shard_of["STU0001"]
+    assert key.startswith('astronomy_')
+    reloaded = StudentManager(path, backend='sharded')
+    assert reloaded.shards.shard_of["STU0001"] == key
+    assert roster(reloaded) == roster(manager)
+
+
+def test_emptied_roster_is_not_resplit(tmp_path):
+    path = str(tmp_path / 'students.json')
+    seed = StudentManager(path)
+    rng = random.Random(4)
+    for i in range(5):
+        seed.add_student(make_student(i, rng))
+    manager = StudentManager(path, backend='sharded')
+    assert roster(manager) == roster(seed)
+    manager.bulk_delete_students(list(roster(manager)))
+    assert roster(StudentManager(path, backend='sharded')) == {}
+
+
+def test_corrupt_shard_is_moved_aside(tmp_path):
+    path = str(tmp_path / 'students.json')
+    manager = StudentManager(path, backend='sharded')
+    rng = random.Random(5)
+    for i in range(30):
+        manager.add_student(make_student(i, rng))
+    shard = manager.shards.path(manager.shards.shard_of["STU0000"])
+    with open(shard, 'w') as file:
+        file.write('{')
+    reloaded = StudentManager(path, backend='sharded')
+    expected = {student_id: row for student_id, row in roster(manager).items()
+                if manager.shards.path(manager.shards.shard_of[student_id]) != shard}
+    assert roster(reloaded) == expected
+    assert os.path.exists(shard + '.corrupt')
+
+
+def test_store_keeps_the_migration_marker(tmp_path):
+    directory = str(tmp_path / 'students')
+    shards = ShardedStudentStore(directory)
+    rng = random.Random(6)
+    students = [make_student(i, rng) for i in range(20)]
+    shards.index(students, dirty=True)
+    shards.write_dirty()
+    shards.index([])
+    shards.dirty.update(shards.shard_key(student) for student in students)
+    shards.write_dirty()
+    assert shards.exists()
+    assert ShardedStudentStore(directory).load(Student.from_dict) == []
+
+
+def test_rejects_unknown_pool(tmp_path):
+    with pytest.raises(ValueError):
+        StudentManager(str(tmp_path / 'students.json'), backend='sharded', shard_pool='fiber')
@@ -0,0 +1,51 @@
+import random
+
+from models.student import performance_status
+from services.manager import StudentManager
+from services.storage import SQLiteStudentStore
+from support import check_reopen_after_mutation, ids, make_student, roster
+
+
+def test_reopen_after_mutation(tmp_path):
+    check_reopen_after_mutation(tmp_path, {'backend': 'sqlite'})
+
+
+def test_seeds_from_json_once(tmp_path):
+    path = str(tmp_path / 'students.json')
+    seed = StudentManager(path)
+    rng = random.Random(4)
+    for i in range(5):
+        seed.add_student(make_student(i, rng))
+    manager = StudentManager(path, backend='sqlite')
+    assert roster(manager) == roster(seed)
+    manager.bulk_delete_students(list(roster(manager)))
+    assert roster(StudentManager(path, backend='sqlite')) == {}
+
+
+def test_store_remembers_seeding(tmp_path):
+    path = str(tmp_path / 'students.db')
+    store = SQLiteStudentStore(path)
+    assert store.needs_seed()
+    store.mark_seeded()
+    store.close()
+    assert not SQLiteStudentStore(path).needs_seed()
+
+
+def test_filters_run_in_sql(tmp_path):
+    path = str(tmp_path / 'students.json')
+    manager = StudentManager(path, backend='sqlite')
+    rng = random.Random(5)
+    for i in range(60):
+        manager.add_student(make_student(i, rng))
+    for performance in (0, 59.9, 60, 74.9, 75, 89.9, 90, 100):
+        manager.update_student("STU0000", performance=performance)
+        assert "STU0000" in ids(manager.filter_by_status(performance_status(performance)))
+    students = manager.get_all_students()
+    manager.db.all = None
+    assert ids(manager.filter_by_status('Good')) == ids(s for s in students if 75 <= s.performance < 90)
+    assert ids(manager.filter_by_status('Unknown')) == []
+    assert ids(manager.filter_by_course('HIST')) == ids(s for s in students if 'hist' in s.course.lower())
+    assert ids(manager.filter_by_department('ence')) == ids(s for s in students if 'ence' in s.department.lower())
+    found = manager.query(status='Needs Improvement', search='smith', age=(18, 30), where=lambda s: s.grade != 'F')
+    assert ids(found) == ids(s for s in students if s.performance < 60 and 'smith' in s.name.lower() and
+                             18 <= s.age <= 30 and s.grade != 'F')
@@ -0,0 +1,77 @@
+import math
+import random
+
+import pytest
+
+from models.student import performance_status
+from services.storage import SQLiteStudentStore
+from support import make_student, mutate
+
+
+def test_statistics_match_a_scan(backend):
+    manager, path, options = backend
+    mutate(manager, random.Random(8))
+    students = manager.get_all_students()
+    stats = manager.get_statistics()
+    assert stats['total_students'] == len(students)
+    assert stats['average_performance'] == round(sum(s.performance for s in students) / len(students), 1)
+    assert stats['average_age'] == round(sum(s.age for s in students) / len(students), 1)
+    for grade, count in stats['grade_distribution'].items():
+        assert count == sum(1 for s in students if s.grade == grade)
+    for status, count in stats['status_distribution'].items():
+        assert count == sum(1 for s in students if performance_status(s.performance) == status)
+    for course in set(s.course for s in students):
+        assert stats['course_distribution'][course or "Undeclared"] == sum(1 for s in students if s.course == course)
+
+
+def test_sqlite_store_aggregates_match_scan(tmp_path):
+    store = SQLiteStudentStore(str(tmp_path / 'students.db'))
+    rng = random.Random(3)
+    records = [make_student(i, rng).to_dict() for i in range(300)]
+    store.insert_many(records)
+    totals = store.totals()
+    assert totals.count == len(records)
+    assert totals.age_total == sum(r['age'] for r in records)
+    assert totals.performance_total == pytest.approx(sum(r['performance'] for r in records))
+    assert totals.courses == {course or "Undeclared": sum(1 for r in records if r['course'] == course)
+                              for course in set(r['course'] for r in records)}
+    best = max(records, key=lambda r: (r['performance'], r['student_id']))
+    assert store.top('performance', 1)[0].student_id == best['student_id']
+    count, total = store.sum_since('enrollment_date', '2024-01-01', 'performance')
+    recent = [r['performance'] for r in records if (r['enrollment_date'] or '') >= '2024-01-01']
+    assert count == len(recent) and total == pytest.approx(sum(recent))
+
+
+def test_percentiles_match_a_scan(backend):
+    manager, path, options = backend
+    mutate(manager, random.Random(8))
+    students = manager.get_all_students()
+    for departments in (None, ['Science'], ['Science', 'Humanities']):
+        values = sorted(s.performance for s in students if departments is None or s.department in departments)
+        bands = manager.get_performance_percentiles(departments)
+        assert list(bands) == ['p10', 'p25', 'p50', 'p75', 'p90']
+        for percentile in (10, 25, 50, 75, 90):
+            exact = values[max(1, math.ceil(percentile / 100 * len(values))) - 1]
+            assert abs(bands[f"p{percentile}"] - exact) <= 0.05 + 1e-9
+            assert manager.get_performance_percentile(percentile) == \
+                   sorted(s.performance for s in students)[max(1, math.ceil(percentile / 100 * len(students))) - 1]
+
+
+def test_rollup_matches_a_scan(backend):
+    manager, path, options = backend
+    mutate(manager, random.Random(8))
+    students = manager.get_all_students()
+    for dimensions, filters in ((('grade',), {}), (('department', 'status'), {}), ((), {'course': 'Physics'})):
+        expected = {}
+        for s in students:
+            key = {'grade': s.grade, 'department': s.department or "Undeclared", 'course': s.course or "Undeclared",
+                   'status': performance_status(s.performance)}
+            if all(key[name] == value for name, value in filters.items()):
+                expected.setdefault(tuple(key[name] for name in dimensions), []).append(s)
+        rollup = manager.get_rollup(dimensions, **filters)
+        assert set(rollup) == set(expected)
+        for group, members in expected.items():
+            assert rollup[group]['count'] == len(members)
+            assert rollup[group]['age_mean'] == pytest.approx(sum(s.age for s in members) / len(members))
+            assert rollup[group]['performance_mean'] == pytest.approx(
+                sum(s.performance for s in members) / len(members))
@@ -0,0 +1,49 @@
+import json
+import random
+
+import pytest
+
+from services.manager import StudentManager
+from services.storage import iter_json_array, iter_snapshot
+from support import check_reopen_after_mutation, make_student, roster
+
+
+def test_reopen_after_mutation(tmp_path):
+    check_reopen_after_mutation(tmp_path, {'streaming': True})
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64 * 1024])
+def test_parser_matches_json_load(tmp_path, chunk_size):
+    rng = random.Random(1)
+    records = [make_student(i, rng).to_dict() for i in range(50)]
+    records[3]['name'] = "Zoë \"Quoted\" Ñandú"
+    path = tmp_path / 'students.json'
+    path.write_text(json.dumps(records, indent=2, ensure_ascii=False), encoding='utf-8')
+    with open(path, 'rb') as file:
+        assert list(iter_json_array(file, chunk_size=chunk_size)) == records
+
+
+@pytest.mark.parametrize('text', ['{"student_id": "STU0001"}', '[{"student_id": "STU0001"},', '[{} {}]'])
+def test_parser_rejects_malformed_arrays(tmp_path, text):
+    path = tmp_path / 'students.json'
+    path.write_text(text)
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_snapshot(str(path), streaming=True))
+
+
+def test_progress_reaches_the_file_size(tmp_path):
+    path = str(tmp_path / 'students.json')
+    seed = StudentManager(path)
+    rng = random.Random(2)
+    for i in range(30):
+        seed.add_student(make_student(i, rng))
+    reports = []
+    manager = StudentManager(path, streaming=True, progress=lambda done, total: reports.append((done, total)))
+    assert roster(manager) == roster(seed)
+    assert reports and reports[-1][0] == reports[-1][1]
+
+
+def test_empty_array(tmp_path):
+    path = tmp_path / 'students.json'
+    path.write_text(' [ ] ')
+    assert list(iter_snapshot(str(path), streaming=True)) == []
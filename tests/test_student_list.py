@@ -0,0 +1,53 @@
+import random
+
+from models.student import Student
+from services.student_list import LazyStudentList, RecordSource, StudentList
+from support import make_student, roster
+
+
+def check_index(students):
+    assert all(students.get(s.student_id) is s for s in students)
+
+
+def test_index_follows_every_list_write():
+    rng = random.Random(1)
+    students = StudentList(make_student(i, rng) for i in range(10))
+    students.append(make_student(10, rng))
+    students.insert(0, make_student(11, rng))
+    students.remove(students.get("STU0003"))
+    students.pop()
+    students.pop(0)
+    students[0] = make_student(12, rng)
+    del students[1:3]
+    students += [make_student(13, rng)]
+    students.extend([make_student(14, rng)])
+    check_index(students)
+    for student_id in ("STU0000", "STU0001", "STU0002", "STU0003", "STU0010", "STU0011"):
+        assert students.get(student_id) is None
+    assert students.remove_ids(["STU0004", "STU0004", "STU9999"]) == ["STU0004"]
+    assert students.get("STU0004") is None
+    check_index(students)
+    students.clear()
+    assert students.get("STU0012") is None
+
+
+def test_lazy_index_follows_appends_and_removals():
+    rng = random.Random(2)
+    students = LazyStudentList(RecordSource([make_student(i, rng).to_dict() for i in range(10)]))
+    students.append(make_student(10, rng))
+    assert students.get("STU0010").student_id == "STU0010"
+    students.remove(students.get("STU0004"))
+    students.remove(students.get("STU0010"))
+    students.append(make_student(11, rng))
+    assert students.get("STU0004") is None and students.get("STU0010") is None
+    assert students.get("STU0011").student_id == "STU0011"
+    assert students.get("STU0005") is students.get("STU0005")
+    assert len(students) == 10
+
+
+def test_duplicate_ids_are_rejected(backend):
+    manager, path, options = backend
+    before = roster(manager)
+    success, _ = manager.add_student(Student.from_dict(dict(manager.get_student("STU0005").to_dict(), name="Copy")))
+    assert not success
+    assert roster(manager) == before
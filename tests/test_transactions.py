@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+from support import make_student, reopen, roster
+
+
+def test_rollback_restores_memory_and_disk(backend):
+    manager, path, options = backend
+    expected = roster(manager)
+    with pytest.raises(ValueError):
+        with manager.transaction():
+            manager.update_student("STU0010", grade='F', performance=1.0)
+            manager.delete_student("STU0011")
+            manager.add_student(make_student(600, random.Random(2)))
+            raise ValueError("abort")
+    assert roster(manager) == expected
+    assert [s.student_id for s in manager.filter_by_grade('F')] == \
+           [s.student_id for s in manager.get_all_students() if s.grade == 'F']
+    assert roster(reopen(manager, path, options)) == expected
+
+
+def test_commit_is_persisted(backend):
+    manager, path, options = backend
+    with manager.transaction():
+        manager.update_student("STU0010", grade='F')
+        manager.delete_student("STU0011")
+    expected = roster(manager)
+    assert expected["STU0010"][2] == 'F' and "STU0011" not in expected
+    assert roster(reopen(manager, path, options)) == expected
+
+
+def test_nested_blocks_join_the_outer_transaction(backend):
+    manager, path, options = backend
+    expected = roster(manager)
+    with pytest.raises(ValueError):
+        with manager.transaction():
+            with manager.transaction():
+                manager.update_student("STU0012", grade='F')
+            raise ValueError("abort")
+    assert roster(reopen(manager, path, options)) == expected
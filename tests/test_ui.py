@@ -0,0 +1,243 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+pytest.importorskip('streamlit')
+pytest.importorskip('pandas')
+pytest.importorskip('plotly')
+
+from support import load_ui
+
+ui = load_ui()
+GRADES = [grade.value for grade in ui.Grade]
+COURSES = ('Physics', 'Biology', 'History')
+DEPARTMENTS = ('Science', 'Humanities', 'Engineering')
+
+
+def make_student(manager, rng):
+    return ui.Student(manager.get_next_student_id(), f"Student {rng.randrange(1000)}", rng.randint(17, 40),
+                      rng.choice(GRADES), "student@example.com", round(rng.uniform(0, 100), 1), "555-0100",
+                      rng.choice(COURSES), rng.choice(DEPARTMENTS), "2024-09-01", round(rng.uniform(50, 100), 1))
+
+
+def churn(manager, steps=400, seed=0):
+    # Random adds, updates and deletes through the manager, the way the pages drive it
+    rng = random.Random(seed)
+    for _ in range(steps):
+        roll = rng.random()
+        students = manager.get_all_students()
+        if roll < 0.3 or len(students) < 5:
+            manager.add_student(make_student(manager, rng))
+        elif roll < 0.8:
+            manager.update_student(rng.choice(students).student_id, performance=round(rng.uniform(0, 100), 1),
+                                   attendance=round(rng.uniform(50, 100), 1), grade=rng.choice(GRADES),
+                                   department=rng.choice(DEPARTMENTS), age=rng.randint(17, 40))
+        elif roll < 0.95:
+            manager.delete_student(rng.choice(students).student_id)
+        else:
+            manager.bulk_delete_students([s.student_id for s in rng.sample(students, 3)] + ["ST999"])
+    return manager.get_all_students()
+
+
+def test_roster_totals_follow_churn():
+    manager = ui.AdvancedStudentManager()
+    students = churn(manager)
+    stats = manager.get_statistics()
+    assert stats['total_students'] == len(students)
+    assert stats['average_performance'] == round(sum(s.performance for s in students) / len(students), 1)
+    assert stats['average_age'] == round(sum(s.age for s in students) / len(students), 1)
+    assert stats['average_attendance'] == round(sum(s.attendance for s in students) / len(students), 1)
+    for name, key in (('status_distribution', ui.Student.calculate_status),
+                      ('grade_distribution', lambda s: s.grade),
+                      ('attendance_distribution', ui.Student.calculate_attendance_status),
+                      ('course_distribution', lambda s: s.course),
+                      ('department_distribution', lambda s: s.department)):
+        counts = {}
+        for student in students:
+            counts[key(student)] = counts.get(key(student), 0) + 1
+        assert {value: count for value, count in stats[name].items() if count} == counts
+    best = max(s.performance for s in students)
+    assert stats['top_performer'] in {s.name for s in students if s.performance == best}
+    most = max(s.attendance for s in students)
+    assert stats['most_attended'] in {s.name for s in students if s.attendance == most}
+
+
+def test_roster_totals_of_an_emptied_roster():
+    manager = ui.AdvancedStudentManager()
+    manager.bulk_delete_students([s.student_id for s in manager.get_all_students()])
+    assert manager.get_statistics() == {}
+    assert manager.totals.count == 0
+    assert manager.totals.top_performer() == "N/A"
+
+
+def test_performance_analysis_matches_numpy():
+    manager = ui.AdvancedStudentManager()
+    for seed in range(3):
+        students = churn(manager, steps=150, seed=seed)
+        performances = np.array([s.performance for s in students])
+        analysis = manager.get_performance_analysis()
+        assert analysis['max_performance'] == performances.max()
+        assert analysis['min_performance'] == performances.min()
+        assert analysis['median_performance'] == pytest.approx(np.median(performances))
+        for name, threshold in (('pass_rate', 60), ('excellence_rate', 90)):
+            assert analysis[name] == pytest.approx(np.count_nonzero(performances >= threshold) / len(performances) * 100)
+
+
+def test_quantile_sketch_bands():
+    sketch = ui.QuantileSketch()
+    assert sketch.percentiles() == {}
+    for value in range(0, 50):
+        sketch.add(value)
+    other = ui.QuantileSketch()
+    for value in range(50, 100):
+        other.add(value)
+    other.add(120)
+    other.add(80, -1)
+    assert sketch.merge(other).percentiles((50, 100)) == {'p50': 49.0, 'p100': 100.0}
+
+
+def test_percentile_bands_follow_churn():
+    manager = ui.AdvancedStudentManager()
+    students = churn(manager)
+    bands = manager.get_performance_analysis()['attendance_bands']
+    values = sorted(s.attendance for s in students)
+    for percentile in (10, 25, 50, 75, 90):
+        exact = values[max(1, math.ceil(percentile / 100 * len(values))) - 1]
+        assert abs(bands[f"p{percentile}"] - exact) <= 0.05 + 1e-9
+
+
+def test_rollup_follows_churn():
+    manager = ui.AdvancedStudentManager()
+    students = churn(manager)
+    for dimensions, filters in ((('grade', 'status'), {}), (('grade', 'status'), {'department': 'Science'}),
+                                (('attendance_status',), {'course': 'Physics'})):
+        expected = {}
+        for s in students:
+            key = {'department': s.department, 'course': s.course, 'grade': s.grade, 'status': s.calculate_status(),
+                   'attendance_status': s.calculate_attendance_status()}
+            if all(key[name] == value for name, value in filters.items()):
+                expected.setdefault(tuple(key[name] for name in dimensions), []).append(s)
+        cells = manager.rollup(dimensions, **filters)
+        assert set(cells) == set(expected)
+        for group, members in expected.items():
+            performances = np.array([s.performance for s in members])
+            attendances = np.array([s.attendance for s in members])
+            assert cells[group]['count'] == len(members)
+            assert cells[group]['performance_mean'] == pytest.approx(performances.mean())
+            assert cells[group]['attendance_mean'] == pytest.approx(attendances.mean())
+            assert cells[group]['performance_std'] == pytest.approx(performances.std(), abs=1e-3)
+
+
+def test_cached_results_follow_the_fields_they_read():
+    manager = ui.AdvancedStudentManager()
+    stats = manager.get_statistics()
+    analysis = manager.get_performance_analysis()
+    assert manager.get_statistics() is stats
+    manager.update_student("ST001", phone="555-0199")
+    assert manager.get_statistics() is stats
+    manager.update_student("ST001", department="Physics")
+    assert manager.get_performance_analysis() is analysis
+    assert manager.get_statistics() is not stats
+    assert manager.get_statistics()['department_distribution']['Physics'] == 1
+    assert "Physics" in manager.get_departments()
+    manager.update_student("ST002", performance=12.0)
+    assert manager.get_performance_analysis()['min_performance'] == 12.0
+    departments = manager.get_departments()
+    manager.update_student("ST003", attendance=50.0)
+    assert manager.get_departments() is departments
+    manager.delete_student("ST004")
+    assert manager.get_departments() is not departments
+    assert manager.get_statistics()['total_students'] == 9
+
+
+def test_cached_results_match_a_fresh_manager():
+    manager = ui.AdvancedStudentManager()
+    for seed in range(4):
+        manager.get_statistics()
+        manager.get_performance_analysis()
+        manager.rollup(('grade',))
+        churn(manager, steps=50, seed=seed)
+        fresh = ui.AdvancedStudentManager()
+        fresh.students = list(manager.get_all_students())
+        fresh.rebuild_index()
+        assert manager.get_statistics() == fresh.get_statistics()
+        analysis, expected = manager.get_performance_analysis(), fresh.get_performance_analysis()
+        assert set(analysis) == set(expected)
+        for name, value in expected.items():
+            assert analysis[name] == (value if isinstance(value, dict) else pytest.approx(value, abs=1e-6))
+        assert set(manager.rollup(('grade',))) == set(fresh.rollup(('grade',)))
+        for group, cell in fresh.rollup(('grade',)).items():
+            assert manager.rollup(('grade',))[group] == pytest.approx(cell, abs=1e-6)
+
+
+def test_running_moments_match_numpy_under_churn():
+    manager = ui.AdvancedStudentManager()
+    for seed in range(6):
+        students = churn(manager, steps=500, seed=seed)
+        moments = manager.totals.moments
+        columns = {field: np.array([getattr(s, field) for s in students], dtype=float) for field in moments.FIELDS}
+        for field, values in columns.items():
+            assert moments.mean(field) == pytest.approx(values.mean(), abs=1e-9)
+            assert moments.std(field) == pytest.approx(values.std(), abs=1e-9)
+        assert moments.correlation('performance', 'attendance') == pytest.approx(
+            np.corrcoef(columns['performance'], columns['attendance'])[0, 1], abs=1e-9)
+        student = students[0]
+        assert manager.get_zscore(student.student_id) == pytest.approx(
+            (student.performance - columns['performance'].mean()) / columns['performance'].std(), abs=1e-9)
+
+
+def test_running_moments_resync_after_removals():
+    manager = ui.AdvancedStudentManager()
+    rng = random.Random(3)
+    for _ in range(200):
+        student = make_student(manager, rng)
+        student.performance = 70.0
+        manager.add_student(student)
+    for student in manager.get_all_students()[:10]:
+        manager.update_student(student.student_id, performance=70.0)
+    for _ in range(3000):
+        student = rng.choice(manager.get_all_students())
+        manager.update_student(student.student_id, attendance=round(rng.uniform(50, 100), 1))
+    assert manager.totals.moments.std('performance') < 1e-9
+    manager.bulk_delete_students([s.student_id for s in manager.get_all_students()[1:]])
+    assert manager.totals.moments.std('performance') == 0.0
+    assert manager.get_zscore("ST001") == 0.0
+    assert manager.get_performance_analysis()['correlation'] == 0
+
+
+def test_next_id_follows_adds_deletes_and_imports():
+    manager = ui.AdvancedStudentManager()
+    assert manager.get_next_student_id() == "ST011"
+    rng = random.Random(4)
+    manager.add_student(ui.Student("ST042", "Ann Lee", 20, GRADES[0], "ann@example.com", 80.0))
+    manager.add_student(ui.Student("EXT-7", "Bob Ray", 20, GRADES[0], "bob@example.com", 80.0))
+    assert manager.get_next_student_id() == "ST043"
+    manager.delete_student("ST042")
+    assert manager.get_next_student_id() == "ST043"
+    manager.add_student(make_student(manager, rng))
+    ok, _, errors = manager.import_from_csv("name,age,email,performance,course\n"
+                                            "Carla Diaz,21,carla@example.com,70,Physics\n"
+                                            "Dan Smith,22,dan@example.com,90,Biology\n")
+    assert ok and not errors
+    assert [s.student_id for s in manager.get_all_students()[-3:]] == ["ST043", "ST044", "ST045"]
+    assert manager.get_next_student_id() == "ST046"
+    manager.rebuild_index()
+    assert manager.get_next_student_id() == "ST046"
+
+
+def test_query_students_matches_a_scan():
+    manager = ui.AdvancedStudentManager()
+    students = churn(manager, steps=600, seed=7)
+    statuses = [status.value for status in ui.PerformanceStatus]
+    for grade in [None] + GRADES[:2]:
+        for status in [None] + statuses[:2]:
+            for department in (None, 'Science', 'Unknown'):
+                for query in (None, 'student 1'):
+                    expected = [s.student_id for s in students
+                                if (not grade or s.grade == grade) and (not status or s.calculate_status() == status)
+                                and (not department or s.department == department)
+                                and (not query or query in s.name.lower())]
+                    found = manager.query_students(query, status, grade, department)
+                    assert [s.student_id for s in found] == expected